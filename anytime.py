@@ -0,0 +1,77 @@
+""" 按时间预算求解
+solve 只在一次搜索内按迭代次数或时间截止，没找到方案就什么也不返回。solveAnytime 在给定的时间预算内
+按 schedule 依次运行多轮搜索，直到找到必胜方案、预算用完或被取消：
+    第 1 轮  原来的贪心搜索（1e4 次迭代，与 solve 的默认设置相同）
+    之后     交替运行随机同分规则的贪心搜索（每轮换一个种子，即随机重启）和集束搜索，
+             迭代上限与集束宽度逐轮翻倍（逐步加宽），直到 MAX_SCALE 倍
+每一轮都记录剩余牌数最少的局面，partial 为 True 时没找到方案也返回其中最好的一个，调用方可以据此
+判断是继续求解还是重开一局。cancel 为 search.CancelToken，可以在其他线程中随时调用 cancel() 提前结束。
+
+用法：
+    cancel = CancelToken()
+    state = solveAnytime(cardList, colorHome, 10, cancel=cancel, partial=True, stats=stats)
+    state.remainingCards == 0  # 是否为必胜方案
+"""
+import itertools
+import time
+
+from search import solve, CancelToken, GreedySearch, BeamSearch
+
+BASE_ITERATIONS = 1e4 # 第一轮的迭代次数上限
+BASE_WIDTH = 32       # 集束搜索第一轮的宽度
+MAX_SCALE = 32        # 迭代上限与集束宽度最多放大的倍数
+
+def defaultSchedule(): # 默认的轮次，无限产生 (搜索策略, 迭代次数上限)
+    yield GreedySearch(), BASE_ITERATIONS
+    for k in itertools.count(1):
+        scale = min(1 << k, MAX_SCALE)
+        yield GreedySearch(tieBreak="random", seed=k), BASE_ITERATIONS*scale
+        yield BeamSearch(BASE_WIDTH*scale), float("inf") # 集束搜索的展开数受宽度和步数限制
+
+def solveAnytime(initialTrays:list[list[str]], colorHome:dict, timeBudget, cancel = None, schedule = None, partial = False,
+                 verbose = True, stats = None, cache = None, tableSize = None, endgame = None,
+                 progress = None, profile = None):
+    # timeBudget 为总的求解时间（秒）；schedule 为 (搜索策略, 迭代次数上限) 的序列，None 时用 defaultSchedule()
+    # 返回必胜方案的最终局面；没找到时 partial 为 True 返回剩余牌数最少的局面，否则返回 None
+    # endgame 为 EndgameTable 时在各轮之间共用，前几轮穷举过的残局之后直接查表
+    # progress 与 profile 传给每一轮的 solve，profile 累加各轮的分阶段耗时
+    # stats 为字典时写入轮数、总迭代次数、耗时、是否被取消、是否必败、最好局面的剩余牌数和各轮的统计 rounds
+    # 是否必败（unsolvable）与 solve 相同，只由残局表判定
+    startTime = time.perf_counter()
+    deadline = startTime + timeBudget
+    if cancel is None: cancel = CancelToken()
+    if schedule is None: schedule = defaultSchedule()
+    best = None
+    rounds = []
+    for strategy, maxIterations in schedule:
+        timeLeft = deadline - time.perf_counter()
+        if timeLeft <= 0 or cancel.cancelled: break
+        roundStats = {}
+        state = solve(initialTrays, colorHome, maxIterations=maxIterations, timeLimit=timeLeft, verbose=False,
+                      stats=roundStats, strategy=strategy, cache=cache, tableSize=tableSize, cancel=cancel, partial=True,
+                      endgame=endgame, progress=progress, profile=profile)
+        rounds.append(roundStats)
+        if state is None or roundStats["unsolvable"]: break # 输入错误或牌局必败，换一种搜索也没有用
+        if best is None or (state.remainingCards, state.turn) < (best.remainingCards, best.turn): best = state
+        if best.remainingCards == 0: break
+        if verbose: print("第", len(rounds), "轮", roundStats["strategy"], "没找到必胜方案，最少还剩", state.remainingCards, "张牌")
+    solved = best is not None and best.remainingCards == 0
+    unsolvable = bool(rounds) and rounds[-1]["unsolvable"]
+    if verbose:
+        if solved: print("第", len(rounds), "轮找到必胜方案，用时", f"{time.perf_counter()-startTime:.2f}", "秒")
+        elif unsolvable: print("牌局必败，重开吧")
+        elif cancel.cancelled: print("求解被取消，共进行", len(rounds), "轮")
+        else: print("时间预算用完，共进行", len(rounds), "轮，没找到必胜方案")
+    if stats is not None:
+        stats["rounds"] = rounds
+        stats["iterations"] = sum(r["iterations"] for r in rounds)
+        stats["statesExplored"] = sum(r["statesExplored"] for r in rounds)
+        stats["elapsed"] = time.perf_counter() - startTime
+        stats["strategy"] = rounds[-1]["strategy"] if solved else None
+        stats["cacheHit"] = solved and rounds[-1]["cacheHit"]
+        stats["cancelled"] = cancel.cancelled
+        stats["unsolvable"] = unsolvable
+        stats["stuckPruned"] = sum(r["stuckPruned"] for r in rounds)
+        stats["bestRemaining"] = best.remainingCards if best is not None else None
+        if profile is not None: stats["profile"] = profile.toDict()
+    return best if solved or partial else None
@@ -0,0 +1,85 @@
+""" 输入/截图后端
+脚本通过 Backend 截图和操作鼠标，不直接调用 pyautogui，因此同一套流程既能操作真实游戏，也能在模拟器中运行：
+    PyAutoGuiBackend  操作真实的游戏窗口
+    SimulatorBackend  在进程内模拟游戏，见 simulator.py
+executeMove 把求解得到的一步换算成屏幕坐标交给后端，坐标只在这里换算。
+"""
+import time
+
+import cv2
+import numpy as np
+
+from layout import POPCOLORLOCATION, SCREEN_REGION, DRAGON_BUTTONS, trayPoint, slotPoint
+from solver import moveToDict, SUIT_OF
+from timing import WAIT_UNIT, WAIT_SLEEP_UNIT
+
+class Backend: # 后端接口：截图、点击、拖动，以及等待和计时（模拟器中为模拟时间）
+    def screenshot(self): # 返回 BGR 截图
+        raise NotImplementedError
+
+    def click(self, x, y):
+        raise NotImplementedError
+
+    def drag(self, fromX, fromY, toX, toY): # 按住鼠标从 (fromX, fromY) 拖到 (toX, toY)
+        raise NotImplementedError
+
+    def sleep(self, seconds):
+        raise NotImplementedError
+
+    def now(self): # 当前时间（秒）
+        raise NotImplementedError
+
+class PyAutoGuiBackend(Backend): # 用 pyautogui 操作真实的游戏窗口；pyautogui 在构造时才导入，没有显示器的机器也能导入本模块
+    def __init__(self, region = SCREEN_REGION):
+        import pyautogui
+        self.pag = pyautogui
+        self.region = region
+
+    def screenshot(self):
+        return cv2.cvtColor(np.array(self.pag.screenshot(region=self.region)), cv2.COLOR_RGB2BGR)
+
+    def click(self, x, y): # 游戏似乎不支持 click 方法，因此用按压/释放的方式模拟点击
+        self.pag.moveTo(x, y, duration=WAIT_UNIT)
+        self.pag.mouseDown()
+        time.sleep(WAIT_UNIT)
+        self.pag.mouseUp()
+        time.sleep(WAIT_SLEEP_UNIT)
+
+    def drag(self, fromX, fromY, toX, toY):
+        self.pag.moveTo(fromX, fromY, duration=WAIT_UNIT)
+        time.sleep(WAIT_SLEEP_UNIT)
+        self.pag.mouseDown()
+        self.pag.moveTo(toX, toY, duration=WAIT_UNIT)
+        self.pag.mouseUp()
+        time.sleep(WAIT_SLEEP_UNIT)
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+    def now(self):
+        return time.perf_counter()
+
+def executeMove(backend:Backend, preState, state, verbose = True): # 在 backend 上执行从 preState 到 state 的一步
+    if verbose: print("第",state.turn,"回合操作：",end="")
+    method = moveToDict(state.action)
+    if "collapse" in method:
+        if verbose: print({'R': "拆掉红中", 'B': "拆掉白板", 'G': "拆掉发财"}[method["collapse"]])
+        backend.click(*DRAGON_BUTTONS[method["collapse"]])
+    elif "pop" in method:
+        if verbose: print("从第",method["pop"]+1,"堆中弹出一张牌")
+        xid = method["pop"]; yid = len(preState.trays[xid])-1
+        colorId = state.cardHome[SUIT_OF[preState.trays[xid][-1]]]
+        backend.drag(*trayPoint(xid, yid), *POPCOLORLOCATION[colorId])
+    elif "tray" in method["from"] and "tray" in method["to"]:
+        if verbose: print("从",method["from"]["tray"]+1,"堆移",method["from"]["count"],"到",method["to"]["tray"]+1,"堆")
+        xfid = method["from"]["tray"]; yfid = len(preState.trays[xfid])-method["from"]["count"]
+        xtid = method["to"]["tray"]; ytid = len(preState.trays[xtid])
+        backend.drag(*trayPoint(xfid, yfid), *trayPoint(xtid, ytid))
+    elif "slot" in method["from"] and "tray" in method["to"]:
+        if verbose: print("从",method["from"]["slot"]+1,"槽到",method["to"]["tray"]+1,"堆")
+        xtid = method["to"]["tray"]
+        backend.drag(*slotPoint(method["from"]["slot"]), *trayPoint(xtid, len(preState.trays[xtid])))
+    elif "tray" in method["from"] and "slot" in method["to"]:
+        if verbose: print("从",method["from"]["tray"]+1,"堆移到",method["to"]["slot"]+1,"槽")
+        xfid = method["from"]["tray"]
+        backend.drag(*trayPoint(xfid, len(preState.trays[xfid])-1), *slotPoint(method["to"]["slot"]))
@@ -0,0 +1,129 @@
+""" 无界面批量求解
+从文件或标准输入逐行读取牌局，分发到进程池中求解，并以 JSONL 格式逐条输出结果。
+
+每行一个牌局，可以是 8 个牌堆组成的 JSON 数组：
+    [["r1","F","R"], ["b2","g5"], ...]
+也可以是带编号和收牌区信息的 JSON 对象：
+    {"id": "deal-1", "trays": [[...], ...], "colorHome": {"r": null, "b": 0, "g": null}}
+空行和以 # 开头的行会被跳过。
+
+用法：
+    python batch.py deals.jsonl -o results.jsonl --workers 8 --time-limit 10 --strategy astar --weight 1.5
+--time-budget N 在 N 秒内多轮重启搜索（见 anytime.py），此时忽略 --strategy 等搜索参数，未解出时结果中附带最好局面的剩余牌数。
+--optimize N 用深度为 N 的局部搜索缩短方案（见 optimizer.py），结果中附带省下的步数与估计执行时间。
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from multiprocessing import Pool
+
+from solver import moveToDict
+from search import solve, solutionMoves, makeStrategy, STRATEGIES
+from anytime import solveAnytime
+from optimizer import optimizeSolution
+
+def parseDeal(line:str, lineNo:int): # 解析一行牌局，返回 (编号, 牌堆, 收牌区)；格式错误时抛出 ValueError
+    deal = json.loads(line)
+    colorHome = {'r':None, 'b':None, 'g':None}
+    if isinstance(deal, list):
+        dealId, trays = lineNo, deal
+    elif isinstance(deal, dict):
+        dealId, trays = deal.get("id", lineNo), deal.get("trays")
+        if not isinstance(deal.get("colorHome") or {}, dict): raise ValueError("colorHome 应为对象")
+        colorHome.update(deal.get("colorHome") or {})
+    else:
+        raise ValueError("每行应为牌堆数组或对象")
+    if not isinstance(trays, list) or not all(isinstance(tray, list) for tray in trays):
+        raise ValueError("trays 应为牌堆数组")
+    if not all(isinstance(card, str) for tray in trays for card in tray):
+        raise ValueError("牌名应为字符串")
+    return dealId, trays, colorHome
+
+def readDeals(stream): # 逐行产生 (行号, 原始文本)，跳过空行与注释
+    for lineNo,line in enumerate(stream, 1):
+        line = line.strip()
+        if len(line) == 0 or line.startswith("#"): continue
+        yield lineNo, line
+
+def solveDeal(job): # 在子进程中求解一个牌局，返回一条结果记录
+    lineNo, line, maxIterations, timeLimit, strategy, tableSize, optimizeDepth, timeBudget = job
+    startTime = time.perf_counter()
+    try:
+        dealId, trays, colorHome = parseDeal(line, lineNo)
+    except (ValueError, KeyError, TypeError, AttributeError) as e:
+        return {"id": lineNo, "solved": False, "error": f"无法解析牌局: {e}"}
+    stats = {}
+    try:
+        if timeBudget is not None:
+            state = solveAnytime(trays, colorHome, timeBudget, verbose=False, stats=stats, tableSize=tableSize)
+        else:
+            state = solve(trays, colorHome, maxIterations=maxIterations, timeLimit=timeLimit, verbose=False, stats=stats,
+                          strategy=strategy, tableSize=tableSize)
+    except (KeyError, IndexError, TypeError, AttributeError) as e: # 牌名、收牌区错误等
+        return {"id": dealId, "solved": False, "error": f"牌局内容错误: {e}"}
+    optimizeStats = {}
+    if state is not None and optimizeDepth > 0:
+        state = optimizeSolution(state, optimizeDepth, optimizeStats)
+    record = {
+        "id": dealId,
+        "solved": state is not None,
+        "moves": [moveToDict(move) for move in solutionMoves(state)] if state is not None else None,
+        "iterations": stats.get("iterations", 0),
+        "statesExplored": stats.get("statesExplored", 0),
+        "wallTime": round(time.perf_counter() - startTime, 6),
+        "strategy": stats.get("strategy"),
+    }
+    if timeBudget is not None:
+        record["rounds"] = len(stats.get("rounds", []))
+        record["bestRemaining"] = stats.get("bestRemaining")
+    if optimizeStats:
+        record["movesSaved"] = optimizeStats["movesSaved"]
+        record["timeSaved"] = round(optimizeStats["timeSaved"], 3)
+    return record
+
+def runBatch(stream, output, workers = None, maxIterations = 1e4, timeLimit = None, ordered = False, strategy = "greedy",
+             tableSize = None, optimizeDepth = 0, timeBudget = None):
+    # 返回 (总局数, 求解成功局数)；strategy 会被传到子进程，需可序列化
+    jobs = ((lineNo, line, maxIterations, timeLimit, strategy, tableSize, optimizeDepth, timeBudget) for lineNo,line in readDeals(stream))
+    total = solved = 0
+    with Pool(workers) as pool:
+        results = pool.imap(solveDeal, jobs) if ordered else pool.imap_unordered(solveDeal, jobs)
+        for record in results:
+            output.write(json.dumps(record, ensure_ascii=False) + "\n")
+            output.flush()
+            total += 1
+            solved += record["solved"]
+    return total, solved
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description="批量求解深圳IO纸牌牌局，结果以 JSONL 输出")
+    parser.add_argument("input", nargs="?", default="-", help="牌局文件，每行一局；省略或为 - 时读取标准输入")
+    parser.add_argument("-o", "--output", default="-", help="结果文件，默认输出到标准输出")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count(), help="进程数，默认为 CPU 核数")
+    parser.add_argument("--time-limit", type=float, default=None, help="每局的求解时间上限（秒）")
+    parser.add_argument("--max-iterations", type=int, default=10000, help="每局的迭代次数上限")
+    parser.add_argument("--ordered", action="store_true", help="按输入顺序输出结果（默认按完成顺序）")
+    parser.add_argument("--strategy", default="greedy", choices=sorted(STRATEGIES), help="搜索策略")
+    parser.add_argument("--weight", type=float, default=None, help="astar/idastar 的启发权重")
+    parser.add_argument("--beam-width", type=int, default=None, help="beam 的集束宽度")
+    parser.add_argument("--table-size", type=int, default=None, help="每局已访问集合的条目上限（固定大小的置换表），默认不限")
+    parser.add_argument("--time-budget", type=float, default=None, help="每局的时间预算（秒），在预算内多轮重启搜索")
+    parser.add_argument("--optimize", type=int, default=0, metavar="DEPTH", help="用深度为 DEPTH 的局部搜索缩短方案，0 为不优化")
+    args = parser.parse_args(argv)
+    strategy = makeStrategy(args.strategy, args.weight, args.beam_width)
+
+    inputStream = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    outputStream = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    startTime = time.perf_counter()
+    try:
+        total, solved = runBatch(inputStream, outputStream, args.workers, args.max_iterations, args.time_limit, args.ordered, strategy,
+                                 args.table_size, args.optimize, args.time_budget)
+    finally:
+        if inputStream is not sys.stdin: inputStream.close()
+        if outputStream is not sys.stdout: outputStream.close()
+    print(f"共 {total} 局，解出 {solved} 局，用时 {time.perf_counter()-startTime:.2f} 秒", file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,176 @@
+""" 求解器基准测试
+在 dealgen 生成的固定牌局上运行 solve，逐局记录每秒状态数、迭代次数、峰值内存、方案长度，
+并汇总求解率。结果保存为 JSON，可以与之前某次提交的结果对比。
+
+用法：
+    python benchmark.py -n 50 --seed 0                       # 结果写入 benchmarks/<提交号>.json
+    python benchmark.py -n 50 --compare benchmarks/abc1234.json
+    python benchmark.py -n 50 --strategy astar --weight 1.5 -o benchmarks/astar.json
+峰值内存用 tracemalloc 在单独一轮中测量，以免影响计时；--no-memory 可跳过这一轮。这一轮不使用残局表，
+所以开启 --endgame 时峰值内存是不查残局表的搜索的内存。
+--no-prune 关闭必败局面剪枝（见 search.py），用来对比剪枝省下的迭代次数。
+--endgame PATH 使用残局表文件（见 endgame.py），第二次运行时残局表已填满，可以对比冷、热两种情况。
+--profile 分阶段统计所有牌局的耗时与分支情况（见 instrument.py），结果写入 profile 字段；计时本身有开销，不要与未开启时的速度比较。
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from dealgen import generateDeals
+from search import solve, solutionMoves, makeStrategy, STRATEGIES
+from endgame import EndgameTable
+from instrument import SolverProfile, formatProfile
+
+def currentCommit(): # 当前 git 提交号，不在仓库中时返回 None
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+def benchmarkDeal(seed, trays, maxIterations, measureMemory = True, strategy = "greedy", tableSize = None,
+                  pruneDeadEnds = True, endgame = None, profile = None):
+    # 对单个牌局计时并（可选）测量峰值内存；profile 为 SolverProfile 时累加分阶段耗时（只在计时的一轮中）
+    # 测量内存的一轮不使用 endgame，以免用到计时一轮刚填入的残局
+    colorHome = {'r':None, 'b':None, 'g':None}
+    stats = {}
+    state = solve(trays, colorHome, maxIterations=maxIterations, verbose=False, stats=stats, strategy=strategy,
+                  tableSize=tableSize, pruneDeadEnds=pruneDeadEnds, endgame=endgame, profile=profile)
+    record = {
+        "seed": seed,
+        "solved": state is not None,
+        "iterations": stats["iterations"],
+        "statesExplored": stats["statesExplored"],
+        "elapsed": stats["elapsed"],
+        "statesPerSecond": stats["statesExplored"] / stats["elapsed"] if stats["elapsed"] > 0 else 0.0,
+        "solutionLength": len(solutionMoves(state)) if state is not None else None,
+        "stuckPruned": stats["stuckPruned"],
+        "unsolvable": stats["unsolvable"], # 只由残局表判定，没有 --endgame 时总是 False
+        "endgameSolved": stats["endgameSolved"],
+        "peakMemory": None,
+    }
+    if measureMemory:
+        tracemalloc.start()
+        try:
+            solve(trays, colorHome, maxIterations=maxIterations, verbose=False, strategy=strategy, tableSize=tableSize,
+                  pruneDeadEnds=pruneDeadEnds)
+            record["peakMemory"] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return record
+
+def summarize(records): # 汇总各局结果
+    solved = [r for r in records if r["solved"]]
+    summary = {
+        "deals": len(records),
+        "solved": len(solved),
+        "solveRate": len(solved) / len(records) if records else 0.0,
+        "totalTime": sum(r["elapsed"] for r in records),
+        "statesPerSecond": sum(r["statesExplored"] for r in records) / max(sum(r["elapsed"] for r in records), 1e-9),
+        "meanIterations": statistics.mean(r["iterations"] for r in records) if records else 0.0,
+        "meanSolutionLength": statistics.mean(r["solutionLength"] for r in solved) if solved else None,
+        "stuckPruned": sum(r.get("stuckPruned", 0) for r in records),
+        "unsolvable": sum(1 for r in records if r.get("unsolvable")), # 残局表判定必败的局数
+        "peakMemory": None,
+    }
+    memories = [r["peakMemory"] for r in records if r["peakMemory"] is not None]
+    if memories: summary["peakMemory"] = max(memories)
+    return summary
+
+def runBenchmark(count, seed = 0, maxIterations = 1e4, measureMemory = True, verbose = True, strategy = "greedy",
+                 tableSize = None, pruneDeadEnds = True, endgame = None, profile = False):
+    strategy = makeStrategy(strategy)
+    solverProfile = SolverProfile() if profile else None
+    records = []
+    for dealSeed, trays in generateDeals(count, seed):
+        record = benchmarkDeal(dealSeed, trays, maxIterations, measureMemory, strategy, tableSize, pruneDeadEnds, endgame,
+                               solverProfile)
+        records.append(record)
+        if verbose:
+            print(f"种子 {dealSeed:5d}  {'解出' if record['solved'] else '未解出'}  迭代 {record['iterations']:6d}  "
+                  f"{record['statesPerSecond']:9.0f} 状态/秒  方案长度 {record['solutionLength']}", file=sys.stderr)
+    return {
+        "commit": currentCommit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": {"count": count, "seed": seed, "maxIterations": maxIterations, "strategy": strategy.name,
+                   "strategyParams": vars(strategy), "tableSize": tableSize, "pruneDeadEnds": pruneDeadEnds,
+                   "endgameThreshold": endgame.threshold if endgame is not None else None, "python": sys.version.split()[0]},
+        "summary": summarize(records),
+        "profile": solverProfile.toDict() if solverProfile is not None else None,
+        "deals": records,
+    }
+
+SUMMARY_FIELDS = [ # (字段, 说明, 数值越大越好)
+    ("solveRate", "求解率", True),
+    ("statesPerSecond", "每秒状态数", True),
+    ("meanIterations", "平均迭代次数", False),
+    ("meanSolutionLength", "平均方案长度", False),
+    ("totalTime", "总耗时(秒)", False),
+    ("peakMemory", "峰值内存(字节)", False),
+]
+
+def compareResults(old, new, output = sys.stdout): # 打印两次结果的汇总差异及求解情况发生变化的牌局
+    if old["config"]["seed"] != new["config"]["seed"] or old["config"]["maxIterations"] != new["config"]["maxIterations"]:
+        print("注意：两次结果的种子或迭代上限不同，对比仅供参考", file=output)
+    print(f"{'指标':<12}{old.get('commit') or '旧':>14}{new.get('commit') or '新':>14}{'变化':>10}", file=output)
+    for field, name, higherIsBetter in SUMMARY_FIELDS:
+        before, after = old["summary"].get(field), new["summary"].get(field)
+        if before is None or after is None:
+            print(f"{name:<12}{str(before):>14}{str(after):>14}", file=output)
+            continue
+        change = (after - before) / before * 100 if before else 0.0
+        better = (change > 0) == higherIsBetter
+        mark = "" if abs(change) < 1 else (" +" if better else " -")
+        print(f"{name:<12}{before:>14.4g}{after:>14.4g}{change:>9.1f}%{mark}", file=output)
+    oldDeals = {r["seed"]: r for r in old["deals"]}
+    for record in new["deals"]:
+        before = oldDeals.get(record["seed"])
+        if before is not None and before["solved"] != record["solved"]:
+            print(f"种子 {record['seed']}：{'未解出 -> 解出' if record['solved'] else '解出 -> 未解出'}", file=output)
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description="在固定种子的牌局上测试求解速度与求解率")
+    parser.add_argument("-n", "--count", type=int, default=50, help="测试的局数")
+    parser.add_argument("--seed", type=int, default=0, help="第一局的种子")
+    parser.add_argument("--max-iterations", type=int, default=10000, help="每局的迭代次数上限")
+    parser.add_argument("--no-memory", action="store_true", help="不测量峰值内存")
+    parser.add_argument("--strategy", default="greedy", choices=sorted(STRATEGIES), help="搜索策略")
+    parser.add_argument("--weight", type=float, default=None, help="astar/idastar 的启发权重")
+    parser.add_argument("--beam-width", type=int, default=None, help="beam 的集束宽度")
+    parser.add_argument("--table-size", type=int, default=None, help="已访问集合的条目上限（固定大小的置换表），默认不限")
+    parser.add_argument("--no-prune", action="store_true", help="关闭必败局面剪枝")
+    parser.add_argument("--endgame", default=None, metavar="PATH", help="使用（并填充）残局表文件")
+    parser.add_argument("--profile", action="store_true", help="分阶段统计耗时与分支情况")
+    parser.add_argument("-o", "--output", default=None, help="结果文件，默认 benchmarks/<提交号>.json")
+    parser.add_argument("--compare", default=None, help="与之前保存的结果文件对比")
+    args = parser.parse_args(argv)
+
+    strategy = makeStrategy(args.strategy, args.weight, args.beam_width)
+    endgame = EndgameTable(args.endgame) if args.endgame else None
+    try:
+        result = runBenchmark(args.count, args.seed, args.max_iterations, not args.no_memory, strategy=strategy,
+                              tableSize=args.table_size, pruneDeadEnds=not args.no_prune, endgame=endgame,
+                              profile=args.profile)
+    finally:
+        if endgame is not None: endgame.close()
+    summary = result["summary"]
+    print(f"共 {summary['deals']} 局，解出 {summary['solved']} 局 ({summary['solveRate']:.1%})，"
+          f"{summary['statesPerSecond']:.0f} 状态/秒，总耗时 {summary['totalTime']:.2f} 秒，剪掉 {summary['stuckPruned']} 个必败局面")
+    if result["profile"] is not None: print(formatProfile(result["profile"]))
+    output = args.output or os.path.join("benchmarks", f"{result['commit'] or 'local'}.json")
+    if os.path.dirname(output): os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=1)
+    print("结果已保存到", output)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compareResults(json.load(f), result)
+
+if __name__ == '__main__':
+    main()
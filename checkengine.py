@@ -0,0 +1,222 @@
+""" 求解器引擎回归检查
+solver.State 为了速度改成了整数编码、增量更新的局面键与位掩码，自动收牌也改成由位掩码驱动。本脚本在随机牌局上
+随机走子，逐步与按原始规则直接实现的参考引擎（与最初版本的 State 相同，使用牌名列表、每次重新扫描）对比：
+    局面      牌堆、槽位、收牌区位置、剩余牌数、优先级与 autoRemoveTimes（决定执行时等待几轮收牌动画）
+    增量数据  局面键 key、各牌堆的 trayKeys、boardMask / topMask / slotMask、lowestPersuit 与从头计算的结果一致
+    撤销      没有自动收牌时，生成的动作中没有撤销上一步（回到上一个局面）的动作，undoMove 的结果与生成器的编码一致
+    必败剪枝  isStuck() 为 True 的局面除了撤销上一步之外确实没有任何动作（每个动作都回到上一个局面）
+另外求解若干局，方案逐步检查合法性，并在参考引擎中重放确认清空桌面。有任何不一致时输出并返回非零值。
+
+用法：
+    python checkengine.py --deals 40 --seed 0
+"""
+import argparse
+import random
+import sys
+
+from dealgen import generateDeal
+from solver import (State, SUITS, EMPTY, MOVE_TRAY, KEY_MASK, CARD_BIT, DRAGON_BASE, ZOBRIST_SLOT, moveToDict, decodeTray,
+                    mixTrayKey, trayZobrist)
+from search import solve, solutionMoves
+
+WALK_LENGTH = 300 # 每局随机走子的最大步数
+
+def referenceAutoRemove(trays, slots, cardHome, cardHomeId): # 原始的自动收牌，返回 (cardHomeId, 收牌轮数)
+    callAgainFlag = True
+    counts = 0
+    while callAgainFlag:
+        counts += 1
+        callAgainFlag = False
+        lowestPersuit = {'r':10, 'b':10, 'g':10}
+        for i,tray in enumerate(trays):
+            if len(tray) == 0: continue
+            lastCard = tray[-1]
+            if lastCard == 'F':
+                tray.pop()
+                callAgainFlag = True
+            elif len(lastCard) == 2 and lastCard[1] == '1':
+                cardHome[lastCard[0]] = cardHomeId
+                cardHomeId += 1
+                tray.pop()
+                callAgainFlag = True
+            for card in tray:
+                if len(card) == 2 and int(card[1]) < lowestPersuit[card[0]]:
+                    lowestPersuit[card[0]] = int(card[1])
+        for slotCard in slots:
+            if slotCard is not None and len(slotCard) == 2 and int(slotCard[1]) < lowestPersuit[slotCard[0]]:
+                lowestPersuit[slotCard[0]] = int(slotCard[1])
+        def removable(card):
+            value = int(card[1])
+            if value > 2: return all(value <= lowest for lowest in lowestPersuit.values())
+            return value == 2 and value == lowestPersuit[card[0]]
+        for tray in trays:
+            if len(tray) > 0 and len(tray[-1]) == 2 and removable(tray[-1]):
+                tray.pop()
+                callAgainFlag = True
+        for i,slotCard in enumerate(slots):
+            if slotCard is not None and len(slotCard) == 2 and removable(slotCard):
+                slots[i] = None
+                callAgainFlag = True
+    return cardHomeId, counts-1
+
+def referenceApply(reference, action): # 在参考局面 (牌堆, 槽位, 收牌区, 下一个收牌区序号) 上执行字典形式的动作
+    trays, slots, cardHome, cardHomeId = reference
+    trays, slots, cardHome = [list(tray) for tray in trays], list(slots), dict(cardHome)
+    if "collapse" in action:
+        target = action["collapse"]
+        for tray in trays:
+            if len(tray) != 0 and tray[-1] == target: tray.pop()
+        for i,slot in enumerate(slots):
+            if slot == target: slots[i] = None
+        slots[slots.index(None)] = 'X'
+    elif "pop" in action:
+        trays[action["pop"]].pop()
+    else:
+        if "tray" in action["from"]:
+            source = trays[action["from"]["tray"]]
+            cards = source[len(source)-action["from"]["count"]:]
+            del source[len(source)-action["from"]["count"]:]
+        else:
+            cards = [slots[action["from"]["slot"]]]
+            slots[action["from"]["slot"]] = None
+        if "tray" in action["to"]: trays[action["to"]["tray"]].extend(cards)
+        else: slots[action["to"]["slot"]] = cards[0]
+    cardHomeId, rounds = referenceAutoRemove(trays, slots, cardHome, cardHomeId)
+    return (trays, slots, cardHome, cardHomeId), rounds
+
+def referenceInitial(trays, colorHome): # 初始的参考局面（开局时同样自动收牌）
+    trays, slots, cardHome = [list(tray) for tray in trays], [None]*3, dict(colorHome)
+    cardHomeId, _ = referenceAutoRemove(trays, slots, cardHome, sum(1 for c in colorHome.values() if c is not None))
+    return trays, slots, cardHome, cardHomeId
+
+def referenceCanBeStacked(card1, card2): # 原始的堆叠判断（牌名形式）
+    if len(card1) != 2 or len(card2) != 2: return False
+    if card1[0] == card2[0]: return False
+    return int(card1[1]) + 1 == int(card2[1])
+
+def referencePriority(trays, slots, turn): # 原始的优先级计算
+    remainingCards = sum(len(tray) for tray in trays) + sum(1 for slot in slots if slot is not None and slot != 'X')
+    stackedCards = 0
+    for tray in trays:
+        if len(tray) == 0: continue
+        localStackedCards = sum(1 for i in range(len(tray)-1, 0, -1) if referenceCanBeStacked(tray[i], tray[i-1]))
+        if len(tray) > 1 and localStackedCards == len(tray)-1:
+            stackedCards += localStackedCards * (1.2 if int(tray[0][1]) == 9 else 1.1)
+        else: stackedCards += localStackedCards
+    if remainingCards == 0: return -999
+    if remainingCards < 10: return -100 + remainingCards + turn*0.1
+    return remainingCards + turn*0.1 - stackedCards*0.9
+
+def checkIncremental(state:State): # 增量维护的局面键与位掩码是否与从头计算的一致，返回不一致的字段名列表
+    errors = []
+    trayKeys = tuple(trayZobrist(tray) for tray in state.trays)
+    key = (sum(mixTrayKey(k) for k in trayKeys) + sum(ZOBRIST_SLOT[slot] for slot in state.slots)) & KEY_MASK
+    boardMask = topMask = slotMask = 0
+    for tray in state.trays:
+        for card in tray:
+            if card < DRAGON_BASE: boardMask |= CARD_BIT[card]
+        if len(tray) > 0: topMask |= CARD_BIT[tray[-1]]
+    for slot in state.slots:
+        if slot < DRAGON_BASE: slotMask |= CARD_BIT[slot]
+    boardMask |= slotMask # 槽位中的普通牌仍在桌面上
+    if state.trayKeys != trayKeys: errors.append("trayKeys")
+    if state.key != key: errors.append("key")
+    if state.boardMask != boardMask: errors.append("boardMask")
+    if state.topMask != topMask: errors.append("topMask")
+    if state.slotMask != slotMask: errors.append("slotMask")
+    if state.lowestPersuit != state.calcLowestPersuit(): errors.append("lowestPersuit")
+    return errors
+
+def isReallyStuck(state:State): # 精确判断：每个动作（包括撤销）都回到上一个局面
+    moves = state.getValidTrayActions() + state.getValidSlotActions()
+    firstEmptySlot = state.slots.find(EMPTY)
+    undo = state.undoMove(state.trays.index(b"") if b"" in state.trays else -1, firstEmptySlot)
+    if undo is not None: moves.append(undo)
+    parentKey = state.prevState.key
+    return all(State(state, move).key == parentKey for move in moves)
+
+def checkUndo(state:State): # 没有自动收牌时，生成的动作中不应有上一步的撤销，返回不一致的字段名列表
+    if state.autoRemoveTimes != 0: return []
+    undo = state.undoMove(state.trays.index(b"") if b"" in state.trays else -1, state.slots.find(EMPTY))
+    if undo is None: return []
+    problems = []
+    moves = state.getValidTrayActions() + state.getValidSlotActions()
+    if undo in moves: problems.append("撤销未剪掉")
+    elif undo & 7 != MOVE_TRAY and any(move & 0x7FF == undo & 0x7FF for move in moves): # 槽位动作的张数是固定的，只有编码不同
+        problems.append("撤销编码")
+    if state.isLegalMove(undo) and State(state, undo).key != state.prevState.key: problems.append("undoMove") # 撤销不一定合法
+    return problems
+
+def compareStep(child:State, reference, rounds): # 一步之后的局面与参考局面对比，返回不一致的字段名列表
+    refTrays, refSlots, refHome, _ = reference
+    problems = checkIncremental(child)
+    if [decodeTray(tray) for tray in child.trays] != refTrays or decodeTray(child.slots) != refSlots:
+        problems.append("局面")
+    if child.cardHome != tuple(refHome[suit] for suit in SUITS): problems.append("cardHome")
+    if child.autoRemoveTimes != rounds: problems.append("autoRemoveTimes")
+    if child.priority != referencePriority(refTrays, refSlots, child.turn): problems.append("priority")
+    return problems
+
+def checkWalk(trays, colorHome, rng, walkLength = WALK_LENGTH, report = print): # 随机走子并逐步对比，返回 (步数, 错误数, isStuck 次数)
+    state = State(customTrays=trays, initColorHome=colorHome)
+    reference = referenceInitial(trays, colorHome)
+    steps = errors = stuck = 0
+    for _ in range(walkLength):
+        moves = state.getValidTrayActions() + state.getValidSlotActions()
+        if len(moves) == 0 or state.remainingCards == 0: break
+        move = rng.choice(moves)
+        child = State(state, move)
+        reference, rounds = referenceApply(reference, moveToDict(move))
+        problems = compareStep(child, reference, rounds) + checkUndo(child)
+        if child.isStuck():
+            stuck += 1
+            if not isReallyStuck(child): problems.append("isStuck")
+        if problems:
+            errors += 1
+            report(f"第 {child.turn} 步 {moveToDict(move)} 不一致: {', '.join(problems)}")
+        steps += 1
+        state = child
+    return steps, errors, stuck
+
+def checkSolution(trays, colorHome, report = print): # 求解并逐步对比方案（多轮自动收牌主要出现在这里），返回错误数
+    state = solve(trays, colorHome, verbose=False)
+    if state is None: return 0 # 没解出不算错误
+    current = State(customTrays=trays, initColorHome=colorHome)
+    reference = referenceInitial(trays, colorHome)
+    errors = 0
+    for move in solutionMoves(state):
+        if not current.isLegalMove(move):
+            report(f"方案中第 {current.turn+1} 步 {moveToDict(move)} 不合法")
+            return errors + 1
+        current = State(current, move)
+        reference, rounds = referenceApply(reference, moveToDict(move))
+        problems = compareStep(current, reference, rounds)
+        if problems:
+            errors += 1
+            report(f"方案中第 {current.turn} 步 {moveToDict(move)} 不一致: {', '.join(problems)}")
+    if any(reference[0]) or any(slot not in (None, 'X') for slot in reference[1]):
+        report("方案在参考引擎中没有清空桌面")
+        return errors + 1
+    return errors
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description="与原始规则的参考实现对比，检查求解器引擎")
+    parser.add_argument("--deals", type=int, default=40, help="局数")
+    parser.add_argument("--seed", type=int, default=0, help="第一局的种子")
+    parser.add_argument("--walk", type=int, default=WALK_LENGTH, help="每局随机走子的最大步数")
+    parser.add_argument("--walks", type=int, default=5, help="每局随机走子的次数")
+    args = parser.parse_args(argv)
+    colorHome = {'r':None, 'b':None, 'g':None}
+    totalSteps = totalErrors = totalStuck = 0
+    for seed in range(args.seed, args.seed+args.deals):
+        trays = generateDeal(seed)
+        rng = random.Random(seed)
+        for _ in range(args.walks):
+            steps, errors, stuck = checkWalk(trays, colorHome, rng, args.walk)
+            totalSteps += steps; totalErrors += errors; totalStuck += stuck
+        totalErrors += checkSolution(trays, colorHome)
+    print(f"{args.deals} 局，随机走子 {totalSteps} 步（isStuck {totalStuck} 次），不一致 {totalErrors} 处")
+    return 1 if totalErrors else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
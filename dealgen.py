@@ -0,0 +1,41 @@
+""" 牌局生成器
+生成可复现的随机牌局：40 张牌（三种花色 1~9 各一张，红中/白板/发财各四张，一张花牌）洗匀后发成 8 堆、每堆 5 张，
+与 solve 接收的牌堆格式相同。同一个种子总是得到同一局。
+
+用法：
+    python dealgen.py -n 100 --seed 0 > deals.jsonl
+输出的每一行可以直接交给 batch.py。
+"""
+import argparse
+import json
+import random
+
+from solver import SUITS, DRAGONS, TRAY_COUNT
+
+CARDS_PER_TRAY = 5
+
+def newDeck(): # 按固定顺序排列的一副牌
+    deck = [suit+str(value) for suit in SUITS for value in range(1,10)]
+    deck += [dragon for dragon in DRAGONS for _ in range(4)]
+    deck.append("F")
+    return deck
+
+def generateDeal(seed): # 用给定种子洗牌并发成 8 堆
+    deck = newDeck()
+    random.Random(seed).shuffle(deck)
+    return [deck[i*CARDS_PER_TRAY:(i+1)*CARDS_PER_TRAY] for i in range(TRAY_COUNT)]
+
+def generateDeals(count, seed = 0): # 依次产生 (种子, 牌局)，种子从 seed 开始连续递增
+    for dealSeed in range(seed, seed+count):
+        yield dealSeed, generateDeal(dealSeed)
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description="生成可复现的深圳IO纸牌牌局，每行一个 JSON")
+    parser.add_argument("-n", "--count", type=int, default=100, help="生成的局数")
+    parser.add_argument("--seed", type=int, default=0, help="第一局的种子")
+    args = parser.parse_args(argv)
+    for dealSeed, trays in generateDeals(args.count, args.seed):
+        print(json.dumps({"id": dealSeed, "trays": trays}))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,177 @@
+""" 残局精确求解
+剩余牌数不超过 threshold 的局面可以穷举：展开它能到达的所有局面（按与牌堆、槽位顺序无关的规范键去重），
+再从获胜局面开始逆向求出每个局面获胜所需的最少步数，到达不了获胜局面的记为必败。结果全部写入残局表，
+之后遇到其中任何一个局面都直接查表，并沿着步数逐一减少的子局面走出最短的收尾方案。
+已在表中的局面在穷举时作为已知步数的边界，不再展开；超过 maxStates 个局面时放弃，交回一般的搜索。
+
+搜索中（见 search.py）子局面的剩余牌数降到 threshold 以下时先查残局表：必胜则立即接上最短收尾方案结束搜索，
+必败则直接剪掉。残局表可以保存到文件，在多次运行之间复用，也可以预先计算：
+    python endgame.py endgame.table -n 200 --seed 0
+
+文件格式为只追加的记录序列：键长度(uint8) 步数(int16，必败为 -1) 键
+"""
+import argparse
+import heapq
+import os
+import struct
+
+from solver import State, EMPTY
+
+LOST = -1             # 必败局面的步数
+DEFAULT_THRESHOLD = 12 # 剩余牌数不超过该值时使用残局表
+MAX_STATES = 20000    # 一次穷举最多展开的局面数
+RECORD_HEADER = struct.Struct("<Bh")
+
+def canonicalKey(state:State): # 与牌堆、槽位顺序无关的局面键；收牌区的位置不影响胜负和步数，不包含在内
+    return b"\xff".join(sorted(state.trays)) + b"\xfe" + bytes(sorted(state.slots))
+
+def legalMoves(state:State): # 所有不等价的合法动作；与 getValidTrayActions 不同，包括撤销上一步
+    moves = state.getValidTrayActions() + state.getValidSlotActions()
+    undo = state.undoMove(state.trays.index(b"") if b"" in state.trays else -1, state.slots.find(EMPTY))
+    if undo is not None and undo not in moves: moves.append(undo)
+    return moves
+
+class EndgameTable: # 残局表：规范键 -> 获胜所需的最少步数（必败为 LOST）；path 不为 None 时从文件载入并追加新结果
+    def __init__(self, path = None, threshold = DEFAULT_THRESHOLD, maxStates = MAX_STATES):
+        self.path = path
+        self.threshold = threshold
+        self.maxStates = maxStates
+        self.table = {}
+        self.pending = [] # 尚未写入文件的键
+        self.hits = self.misses = 0
+        self.overflows = 0 # 超过 maxStates 而放弃的次数
+        self.tooLarge = set() # 放弃过的局面，不再重复穷举（不写入文件，换用更大的 maxStates 时可以重新尝试）
+        self.file = None
+        if path is not None:
+            self.file = open(path, "a+b")
+            self.load()
+
+    def load(self): # 读取文件中的所有记录，末尾不完整的记录（写入中断）会被截掉
+        self.file.seek(0)
+        data = self.file.read()
+        offset = 0
+        while offset + RECORD_HEADER.size <= len(data):
+            size, distance = RECORD_HEADER.unpack_from(data, offset)
+            end = offset + RECORD_HEADER.size + size
+            if end > len(data): break
+            self.table[data[offset+RECORD_HEADER.size:end]] = distance
+            offset = end
+        if offset < len(data):
+            self.file.truncate(offset)
+        self.file.seek(0, os.SEEK_END)
+
+    def __len__(self):
+        return len(self.table)
+
+    def covers(self, state:State): # state 是否在残局表的适用范围内
+        return state.remainingCards <= self.threshold
+
+    def distance(self, state:State): # 获胜所需的最少步数，必败返回 LOST，局面太多无法穷举时返回 None
+        key = canonicalKey(state)
+        distance = self.table.get(key)
+        if distance is not None:
+            self.hits += 1
+            return distance
+        if key in self.tooLarge: return None
+        self.misses += 1
+        if not self.solveClosure(state, key):
+            self.overflows += 1
+            self.tooLarge.add(key)
+            return None
+        return self.table[key]
+
+    def solveClosure(self, root:State, rootKey): # 穷举 root 能到达的局面并逆向求出步数写入表中；超过 maxStates 时返回 False
+        keys = [rootKey]
+        index = {rootKey: 0}
+        nodes = [root]
+        parents = [[]] # parents[j]：可以一步到达 j 的局面序号
+        heap = [] # (已知步数, 序号)：获胜局面和表中已有的局面
+        i = 0
+        while i < len(nodes):
+            state = nodes[i]
+            nodes[i] = None # 展开后不再需要，尽早释放
+            known = 0 if state.remainingCards == 0 else self.table.get(keys[i]) if i > 0 else None
+            if known is not None:
+                if known != LOST: heap.append((known, i))
+                i += 1
+                continue
+            for move in legalMoves(state):
+                child = State(state, move)
+                child.prevState = None
+                key = canonicalKey(child)
+                j = index.get(key)
+                if j is None:
+                    if len(nodes) >= self.maxStates: return False
+                    j = index[key] = len(nodes)
+                    keys.append(key)
+                    nodes.append(child)
+                    parents.append([])
+                parents[j].append(i)
+            i += 1
+        distances = [None]*len(keys)
+        heapq.heapify(heap)
+        while heap: # 所有动作的代价都是 1，按已知步数从小到大逆向传播
+            distance, j = heapq.heappop(heap)
+            if distances[j] is not None: continue
+            distances[j] = distance
+            for parent in parents[j]:
+                if distances[parent] is None: heapq.heappush(heap, (distance+1, parent))
+        for key, distance in zip(keys, distances):
+            if key not in self.table:
+                self.table[key] = LOST if distance is None else distance
+                self.pending.append(key)
+        return True
+
+    def finishingMoves(self, state:State): # 从 state 获胜的最短动作列表（可直接在 state 上重放），必败或无法穷举时返回 None
+        distance = self.distance(state)
+        if distance is None or distance == LOST: return None
+        moves = []
+        while distance > 0:
+            for move in legalMoves(state):
+                child = State(state, move)
+                if self.distance(child) == distance-1: break
+            else:
+                return None # 表中的步数与局面不一致（文件损坏）
+            moves.append(move)
+            state = child
+            distance -= 1
+        return moves
+
+    def flush(self): # 把新求出的结果追加到文件
+        if self.file is None or not self.pending: return
+        for key in self.pending:
+            self.file.write(RECORD_HEADER.pack(len(key), self.table[key]) + key)
+        self.pending.clear()
+        self.file.flush()
+
+    def close(self):
+        if self.file is None: return
+        self.flush()
+        self.file.close()
+        self.file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def main(argv = None): # 在生成的牌局上求解，预先填充残局表
+    from dealgen import generateDeals
+    from search import solve
+    parser = argparse.ArgumentParser(description="在生成的牌局上预先计算残局表")
+    parser.add_argument("path", help="残局表文件，已存在时在其基础上追加")
+    parser.add_argument("-n", "--count", type=int, default=100, help="局数")
+    parser.add_argument("--seed", type=int, default=0, help="第一局的种子")
+    parser.add_argument("--threshold", type=int, default=DEFAULT_THRESHOLD, help="使用残局表的剩余牌数上限")
+    parser.add_argument("--max-states", type=int, default=MAX_STATES, help="一次穷举最多展开的局面数")
+    args = parser.parse_args(argv)
+    colorHome = {'r':None, 'b':None, 'g':None}
+    with EndgameTable(args.path, args.threshold, args.max_states) as table:
+        for _, trays in generateDeals(args.count, args.seed):
+            solve(trays, colorHome, verbose=False, endgame=table)
+            table.flush()
+        print(f"残局表共 {len(table)} 个局面，命中 {table.hits} 次，穷举 {table.misses} 次，放弃 {table.overflows} 次")
+
+if __name__ == '__main__':
+    main()
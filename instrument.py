@@ -0,0 +1,168 @@
+""" 求解器性能剖析
+solve(..., profile=SolverProfile()) 时，搜索改用 InstrumentedState 与 search.InstrumentedContext，
+分阶段记录耗时（各阶段只算自身时间，嵌套的阶段不重复计算）：
+    moveGeneration     生成动作（getValidTrayActions / getValidSlotActions）
+    stateConstruction  构造子局面（执行动作及增量更新 Zobrist 局面键）
+    autoRemoveCards    自动收牌
+    hashing            已访问集合的查询与记录
+    priority           优先级与启发值（calcPriority / countBlocks）
+    deadEnds           必败局面判断（isStuck）
+    expand             展开中的其余开销（包括查残局表）
+    arena              把子局面记入 SearchArena
+    queue              搜索循环本身：优先队列的出入队与其余簿记
+并统计展开次数、生成的子局面数、重复局面数，由此得到分支因子和重复率。cprofile / tracemalloc 为 True 时
+同时用 cProfile 记录函数级耗时、用 tracemalloc 记录峰值内存。profile 为 None 时搜索使用原来的 State 与
+SearchContext，没有任何额外开销；开启后计时本身会让求解变慢，适合比较各阶段的占比而不是绝对速度。
+
+结果由 toDict() 取出，或用 writeJson 保存；进度回调见 solve 的 progress 参数。
+    python instrument.py -n 20 --strategy astar --cprofile -o profile.json
+"""
+import argparse
+import cProfile
+import json
+import pstats
+import sys
+import time
+import tracemalloc as tracemallocModule
+
+from solver import State
+
+PHASES = ("moveGeneration", "stateConstruction", "autoRemoveCards", "hashing", "priority", "deadEnds",
+          "expand", "arena", "queue")
+TOP_FUNCTIONS = 20 # toDict 中列出的 cProfile 函数数
+
+class InstrumentedState(State): # 各方法计时的 State；profile 由 SolverProfile 创建的子类绑定
+    __slots__ = ()
+    profile = None
+
+    def __init__(self, prevState = None, action = None, customTrays = None, initColorHome = None):
+        self.profile.call("stateConstruction", State.__init__, self, prevState, action, customTrays, initColorHome)
+
+    def autoRemoveCards(self):
+        return self.profile.call("autoRemoveCards", State.autoRemoveCards, self)
+
+    def getValidTrayActions(self):
+        return self.profile.call("moveGeneration", State.getValidTrayActions, self)
+
+    def getValidSlotActions(self):
+        return self.profile.call("moveGeneration", State.getValidSlotActions, self)
+
+    def calcPriority(self, turnWeight = 0.1, stackWeight = 0.9):
+        return self.profile.call("priority", State.calcPriority, self, turnWeight, stackWeight)
+
+    def countBlocks(self):
+        return self.profile.call("priority", State.countBlocks, self)
+
+    def isStuck(self):
+        return self.profile.call("deadEnds", State.isStuck, self)
+
+class SolverProfile: # 一次或多次求解的分阶段耗时与计数，多次求解传入同一个对象时累加
+    def __init__(self, cprofile = False, tracemalloc = False):
+        # cprofile 为 True 时记录函数级耗时；tracemalloc 为 True 时记录峰值内存（已在跟踪时沿用外部的跟踪）
+        self.seconds = dict.fromkeys(PHASES, 0.0)
+        self.calls = dict.fromkeys(PHASES, 0)
+        self.counters = {"solves": 0, "expansions": 0, "duplicates": 0, "accepted": 0}
+        self.childTime = 0.0 # 当前阶段中嵌套阶段已用的时间
+        self.stateClass = type("InstrumentedState", (InstrumentedState,), {"__slots__": (), "profile": self})
+        self.profiler = cProfile.Profile() if cprofile else None
+        self.traceMemory = tracemalloc
+        self.startedTracing = False
+        self.peakMemory = None
+
+    def call(self, phase, fn, *args): # 执行 fn(*args) 并把自身时间（减去嵌套阶段）计入 phase
+        outer = self.childTime
+        self.childTime = 0.0
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.seconds[phase] += elapsed - self.childTime
+            self.calls[phase] += 1
+            self.childTime = outer + elapsed
+
+    def start(self): # 由 solve 在搜索开始前调用
+        self.counters["solves"] += 1
+        if self.traceMemory and not tracemallocModule.is_tracing():
+            tracemallocModule.start()
+            self.startedTracing = True
+        if self.profiler is not None: self.profiler.enable()
+
+    def stop(self): # 由 solve 在搜索结束后调用
+        if self.profiler is not None: self.profiler.disable()
+        if self.traceMemory and tracemallocModule.is_tracing():
+            peak = tracemallocModule.get_traced_memory()[1]
+            self.peakMemory = peak if self.peakMemory is None else max(self.peakMemory, peak)
+            if self.startedTracing:
+                tracemallocModule.stop()
+                self.startedTracing = False
+
+    def functions(self, limit = TOP_FUNCTIONS): # cProfile 中自身耗时最多的 limit 个函数
+        if self.profiler is None or limit <= 0: return []
+        rows = []
+        for (filename, line, name), (_, calls, tottime, cumtime, _) in pstats.Stats(self.profiler).stats.items():
+            rows.append({"function": f"{filename}:{line}({name})", "calls": calls, "tottime": tottime, "cumtime": cumtime})
+        rows.sort(key=lambda row: row["tottime"], reverse=True)
+        return rows[:limit]
+
+    def toDict(self, functions = TOP_FUNCTIONS): # 可直接写成 JSON 的结果；functions 为列出的 cProfile 函数数
+        counters = dict(self.counters)
+        counters["generated"] = self.calls["hashing"] # 每个生成的子局面都查询一次已访问集合
+        expansions, generated = counters["expansions"], counters["generated"]
+        return {
+            "phases": {phase: {"seconds": self.seconds[phase], "calls": self.calls[phase]} for phase in PHASES},
+            "totalSeconds": sum(self.seconds.values()),
+            "counters": counters,
+            "branchingFactor": generated / expansions if expansions else None,
+            "acceptedPerExpansion": counters["accepted"] / expansions if expansions else None,
+            "duplicateRate": counters["duplicates"] / generated if generated else None,
+            "peakMemory": self.peakMemory,
+            "functions": self.functions(functions),
+        }
+
+    def writeJson(self, path): # 把 toDict() 写入文件
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.toDict(), f, ensure_ascii=False, indent=1)
+
+def formatProfile(result): # toDict() 的结果 -> 便于阅读的多行文本
+    total = result["totalSeconds"] or 1e-9
+    lines = [f"{'阶段':<20}{'耗时(秒)':>10}{'占比':>8}{'调用次数':>12}"]
+    for phase, row in sorted(result["phases"].items(), key=lambda item: -item[1]["seconds"]):
+        lines.append(f"{phase:<20}{row['seconds']:>10.3f}{row['seconds']/total:>8.1%}{row['calls']:>12d}")
+    counters = result["counters"]
+    lines.append(f"展开 {counters['expansions']} 次，生成 {counters['generated']} 个子局面，其中重复 {counters['duplicates']} 个")
+    if result["branchingFactor"] is not None:
+        lines.append(f"分支因子 {result['branchingFactor']:.2f}，保留 {result['acceptedPerExpansion']:.2f}，"
+                     f"重复率 {result['duplicateRate']:.1%}")
+    if result["peakMemory"] is not None: lines.append(f"峰值内存 {result['peakMemory']} 字节")
+    for row in result["functions"]:
+        lines.append(f"{row['tottime']:10.3f}{row['cumtime']:10.3f}{row['calls']:>10d}  {row['function']}")
+    return "\n".join(lines)
+
+def main(argv = None): # 在生成的牌局上剖析求解过程
+    from dealgen import generateDeals
+    from search import solve, makeStrategy, STRATEGIES
+    parser = argparse.ArgumentParser(description="分阶段统计求解器的耗时与分支情况")
+    parser.add_argument("-n", "--count", type=int, default=20, help="局数")
+    parser.add_argument("--seed", type=int, default=0, help="第一局的种子")
+    parser.add_argument("--max-iterations", type=int, default=10000, help="每局的迭代次数上限")
+    parser.add_argument("--strategy", default="greedy", choices=sorted(STRATEGIES), help="搜索策略")
+    parser.add_argument("--cprofile", action="store_true", help="同时用 cProfile 记录函数级耗时")
+    parser.add_argument("--tracemalloc", action="store_true", help="同时用 tracemalloc 记录峰值内存")
+    parser.add_argument("--progress", action="store_true", help="每 1000 次迭代向标准错误输出一行 JSON 进度")
+    parser.add_argument("-o", "--output", default=None, help="把结果保存为 JSON 文件")
+    args = parser.parse_args(argv)
+    profile = SolverProfile(cprofile=args.cprofile, tracemalloc=args.tracemalloc)
+    progress = (lambda snapshot: print(json.dumps(snapshot), file=sys.stderr)) if args.progress else None
+    strategy = makeStrategy(args.strategy)
+    colorHome = {'r':None, 'b':None, 'g':None}
+    for _, trays in generateDeals(args.count, args.seed):
+        solve(trays, colorHome, maxIterations=args.max_iterations, verbose=False, strategy=strategy,
+              profile=profile, progress=progress)
+    print(formatProfile(profile.toDict()))
+    if args.output:
+        profile.writeJson(args.output)
+        print("结果已保存到", args.output)
+
+if __name__ == '__main__':
+    main()
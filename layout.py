@@ -0,0 +1,25 @@
+""" 游戏画面布局
+1920x1200 窗口下各区域的像素坐标，识别与鼠标操作共用。
+"""
+ITMH, ITMW = 24, 24  # 卡牌大小
+DISH, DISW = 31, 152 # 卡牌间距
+BEGH, BEGW = 456,409 # 卡牌起始位置
+CNTH, CNTW = 5, 8    # 卡牌行列数
+CDLTH, CDLTW = 8,51  # 鼠标点击时偏移量
+POPCOLORLOCATION = [(1216,234),(1370,234),(1521,234)] # 三个收牌区的位置
+SCREEN_REGION = (0, 0, 1920, 1080) # 截图区域
+
+# 收牌区颜色探测点：第 i 个收牌区取 (HOME_PROBE_Y, HOME_PROBE_X+i*DISW) 处的像素 (BGR)
+HOME_PROBE_Y, HOME_PROBE_X = 208, 1179
+HOME_COLORS = {'b': (0,0,0), 'g': (75,110,18), 'r': (20,44,174)}
+
+# 鼠标操作的位置
+SLOT_X, SLOT_Y = 457, 200 # 第 i 个槽位在 (SLOT_X+i*DISW, SLOT_Y)
+DRAGON_BUTTONS = {'R': (888,217), 'G': (888,303), 'B': (888,385)} # 拆掉红中/发财/白板的按钮
+NEW_GAME_BUTTON = (1511,993)
+
+def trayPoint(tray, row): # 第 tray 堆第 row 张牌的点击位置
+    return BEGW+tray*DISW+CDLTW, BEGH+row*DISH+CDLTH
+
+def slotPoint(slot): # 第 slot 个槽位的点击位置
+    return SLOT_X+slot*DISW, SLOT_Y
@@ -0,0 +1,126 @@
+""" 方案后处理
+搜索得到的方案里常有之后又被撤销的动作、移入槽位又移回来的来回，以及可以用一次整叠移动代替的多次单张移动。
+执行时每一步都要 0.2~0.3 秒的鼠标动画，方案越短每小时能完成的局数越多。
+
+optimizeMoves 沿原方案经过的局面做局部搜索：从第 i 个局面出发做深度不超过 maxDepth 的广度优先搜索，
+只要能到达与原方案中更靠后的第 j 个局面等价的局面（牌堆、槽位的顺序可以不同，收牌区位置相同）且步数少于 j-i，
+就用搜到的动作替换原来的第 i~j 步，并把之后的动作换算到新的牌堆/槽位序号上。原方案中重复出现的局面直接跳过
+中间的动作。反复进行直到没有改进，每一遍都用 replayMoves 逐步检查合法性，并确认到达等价的最终局面
+（原方案是必胜方案时只要求清空桌面），否则保留上一版。
+
+    state = optimizeSolution(state, stats=stats)
+    stats["movesSaved"], stats["timeSaved"]
+"""
+import time
+
+from solver import State, replayMoves, remapMoves, MOVE_COLLAPSE
+from timing import DRAG_TIME, CLICK_TIME, COLLECT_TIME
+
+def exactKey(state:State): # 精确局面：执行时的坐标取决于牌堆和槽位的序号
+    return state.trays, state.slots, state.cardHome
+
+def canonicalKey(state:State): # 与牌堆、槽位顺序无关的局面（收牌区位置仍需相同）
+    return tuple(sorted(state.trays)), bytes(sorted(state.slots)), state.cardHome
+
+def pathStates(initialState:State, moves): # 从 initialState 执行 moves 经过的所有局面（含初始局面）
+    states = [initialState]
+    for move in moves:
+        states.append(State(states[-1], move))
+    return states
+
+def estimateTime(states): # 估计执行 states[0] -> states[-1] 所需的时间（秒）
+    total = 0.0
+    for state in states[1:]:
+        total += CLICK_TIME if state.action & 7 == MOVE_COLLAPSE else DRAG_TIME
+        total += COLLECT_TIME*state.autoRemoveTimes
+    return total
+
+def matchIndices(items, targets): # 为 targets 的每个位置找 items 中内容相同的位置，相同内容（空牌堆、空槽位）按顺序配对
+    pools = {}
+    for i, item in enumerate(items):
+        pools.setdefault(item, []).append(i)
+    return [pools[target].pop(0) for target in targets]
+
+def transplant(state:State, states, moves): # 把从 states[0] 出发的 moves 换算到与之等价、牌堆/槽位顺序不同的 state 上
+    # 逐步按当前的对应关系改写序号（拆龙牌后锁住的槽位可能不同，对应关系会变），顺序一致后余下的动作原样保留
+    newMoves, result = [], [state]
+    for k, move in enumerate(moves):
+        if exactKey(state) == exactKey(states[k]):
+            return newMoves + moves[k:], result + states[k+1:]
+        trayMap = matchIndices(state.trays, states[k].trays)
+        slotMap = matchIndices(state.slots, states[k].slots)
+        move = remapMoves([move], trayMap, slotMap)[0]
+        newMoves.append(move)
+        state = State(state, move)
+        result.append(state)
+    return newMoves, result
+
+def shortcutPass(initialState:State, moves, maxDepth): # 一遍局部搜索，返回 (新的动作列表, 经过的局面)
+    moves = list(moves)
+    states = pathStates(initialState, moves)
+    keys = [canonicalKey(state) for state in states]
+    result, resultStates = [], [initialState]
+    i = 0
+    while i < len(moves):
+        lastIndex = {key: k for k, key in enumerate(keys) if k >= i} # 等价局面在原方案中最后一次出现的序号
+        bestJ, bestPath, bestState = i + 1, [moves[i]], states[i+1]
+        if lastIndex[keys[i]] > i: # 之后会回到等价的局面：跳过中间的动作
+            bestJ, bestPath, bestState = lastIndex[keys[i]], [], states[i]
+        else:
+            frontier = [(states[i], [])]
+            seen = {keys[i]}
+            for depth in range(1, maxDepth + 1):
+                nextFrontier = []
+                for state, path in frontier:
+                    for action in state.getValidTrayActions() + state.getValidSlotActions():
+                        child = State(state, action)
+                        key = canonicalKey(child)
+                        if key in seen: continue
+                        seen.add(key)
+                        j = lastIndex.get(key)
+                        if j is not None and j - depth > bestJ - len(bestPath): # 省下的步数更多
+                            bestJ, bestPath, bestState = j, path + [action], child
+                        nextFrontier.append((child, path + [action]))
+                frontier = nextFrontier
+        for action in bestPath:
+            resultStates.append(State(resultStates[-1], action))
+        result.extend(bestPath)
+        if exactKey(bestState) != exactKey(states[bestJ]): # 到达的是顺序不同的等价局面：换算余下的动作
+            tail, tailStates = transplant(resultStates[-1], states[bestJ:], moves[bestJ:])
+            moves[bestJ:] = tail
+            states[bestJ:] = tailStates
+        i = bestJ
+    return result, resultStates
+
+def optimizeMoves(initialState:State, moves, maxDepth = 2, stats = None):
+    # 返回到达同一最终局面的更短动作列表；stats 为字典时写入优化前后的步数、估计执行时间和耗时
+    startTime = time.perf_counter()
+    states = pathStates(initialState, moves)
+    target = canonicalKey(states[-1])
+    solved = states[-1].remainingCards == 0
+    best, bestStates = list(moves), states
+    while True:
+        candidate, candidateStates = shortcutPass(initialState, best, maxDepth)
+        if len(candidate) >= len(best): break
+        final = replayMoves(initialState, candidate, check=True)
+        if final is None or not (canonicalKey(final) == target or solved and final.remainingCards == 0):
+            break # 不应发生：保险起见保留上一版
+        best, bestStates = candidate, candidateStates
+    if stats is not None:
+        stats["originalMoves"] = len(moves)
+        stats["optimizedMoves"] = len(best)
+        stats["movesSaved"] = len(moves) - len(best)
+        stats["originalTime"] = estimateTime(states)
+        stats["optimizedTime"] = estimateTime(bestStates)
+        stats["timeSaved"] = stats["originalTime"] - stats["optimizedTime"]
+        stats["elapsed"] = time.perf_counter() - startTime
+    return best
+
+def optimizeSolution(state:State, maxDepth = 2, stats = None): # 优化 state 的 prevState 链，返回 prevState 链完整的新终局
+    if state is None: return None
+    moves = []
+    while state.prevState is not None:
+        moves.append(state.action)
+        state = state.prevState
+    moves.reverse()
+    return replayMoves(state, optimizeMoves(state, moves, maxDepth, stats))
@@ -0,0 +1,117 @@
+""" 主循环
+每一局依次进行：点击“新游戏”，轮询截图直到画面稳定且识别出完整的 40 张牌，求解，再逐步执行方案。
+识别、执行都要占用屏幕和鼠标，求解通常不到一秒，所以不再另开线程：省下的时间主要来自不再固定等待。
+原来固定的等待（发牌后 6 秒、自动收牌时每张 0.76 秒）换成 waitForStable：每隔 interval 秒截一张
+缩小 DOWNSCALE 倍的灰度图，与上一张的平均差小于 threshold 且连续 stableFrames 次时认为画面已经静止。
+截图、等待与计时都通过 backend（见 backend.py）进行，在模拟器中运行时使用模拟时间。
+
+用法（各回调见 runPipeline）：
+    stats = runPipeline(backend, recognizer, detectColorHome, solveBoard, executeMove)
+    stats["dealsPerHour"]
+"""
+from collections import Counter
+
+import cv2
+import numpy as np
+
+from dealgen import newDeck
+from layout import NEW_GAME_BUTTON
+from solver import SUITS
+
+DOWNSCALE = 8          # 比较画面时缩小的倍数
+STABLE_THRESHOLD = 1.0 # 相邻两张缩小灰度图的平均差低于该值视为没有变化
+STABLE_FRAMES = 2      # 连续多少次没有变化视为稳定
+POLL_INTERVAL = 0.03   # 轮询间隔（秒）
+DEAL_TIMEOUT = 15.0    # 等待发牌完成的最长时间
+SETTLE_TIMEOUT = 20.0  # 等待自动收牌动画结束的最长时间（最后一次收牌可能有十几轮）
+CHANGE_TIMEOUT = 0.3   # 预期画面会变化时，等待变化开始的最长时间
+
+FULL_DECK = Counter(newDeck())
+
+def frameSignature(img, downscale = DOWNSCALE): # 缩小的灰度图，用于比较画面是否变化
+    small = cv2.resize(img, (img.shape[1]//downscale, img.shape[0]//downscale), interpolation=cv2.INTER_AREA)
+    return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY).astype(np.int16)
+
+def waitForStable(backend, timeout = SETTLE_TIMEOUT, expectChange = False, interval = POLL_INTERVAL,
+                  threshold = STABLE_THRESHOLD, stableFrames = STABLE_FRAMES):
+    # expectChange 为 True 时先等画面开始变化（最多 CHANGE_TIMEOUT 秒），避免动画还没开始就误判为稳定
+    # 返回 (最后一张截图, 是否稳定)；超时时返回最后一张截图和 False
+    startTime = backend.now()
+    img = backend.screenshot()
+    last = frameSignature(img)
+    stable = 0
+    changed = not expectChange
+    while backend.now() - startTime < timeout:
+        backend.sleep(interval)
+        img = backend.screenshot()
+        signature = frameSignature(img)
+        if np.abs(signature - last).mean() < threshold:
+            stable += 1
+            if changed and stable >= stableFrames: return img, True
+            if not changed and backend.now() - startTime > CHANGE_TIMEOUT: changed = True
+        else:
+            stable = 0
+            changed = True
+        last = signature
+    return img, False
+
+def isCompleteDeal(cardList): # 识别结果是否像发完牌的一局：没有多出的牌，缺少的只能是开局时被自动收走的花牌和各花色最小的几张
+    counts = Counter(card for tray in cardList for card in tray)
+    if counts - FULL_DECK: return False
+    missing = FULL_DECK - counts
+    if any(card != "F" and card[0] not in SUITS for card in missing): return False # 龙牌不会被自动收走
+    for suit in SUITS:
+        values = sorted(int(card[1]) for card in missing if card[0] == suit)
+        if values != list(range(1, len(values)+1)): return False
+    return True
+
+def recognizeWhenReady(backend, recognizer, detectColorHome, timeout = DEAL_TIMEOUT):
+    # 轮询直到画面稳定并识别出完整的一局，返回 (cardList, colorHome)；超时返回最后一次的识别结果
+    startTime = backend.now()
+    expectChange = True
+    while True:
+        img, _ = waitForStable(backend, max(0.0, timeout - (backend.now() - startTime)), expectChange)
+        cardList, _ = recognizer.recognize(img)
+        if isCompleteDeal(cardList) or backend.now() - startTime >= timeout:
+            return cardList, detectColorHome(img)
+        expectChange = False
+
+def startNewGame(backend): # 等上一局的画面静止后点击“新游戏”
+    waitForStable(backend)
+    backend.click(*NEW_GAME_BUTTON)
+
+def solutionChain(state): # 沿 prevState 得到 [(上一局面, 局面), ...]，按执行顺序排列
+    chain = []
+    while state is not None and state.prevState is not None:
+        chain.append((state.prevState, state))
+        state = state.prevState
+    chain.reverse()
+    return chain
+
+def runPipeline(backend, recognizer, detectColorHome, solveBoard, executeMove, maxDeals = None, verbose = True):
+    # solveBoard(cardList, colorHome) -> 最终局面或 None；executeMove(上一局面, 局面) 执行一步。
+    # 返回统计：局数、解出局数、每小时局数及识别/求解/执行各自的耗时（都按 backend.now() 计时）
+    timings = {"recognize": 0.0, "solve": 0.0, "execute": 0.0}
+    deals = solved = 0
+    startTime = backend.now()
+    while maxDeals is None or deals < maxDeals:
+        startNewGame(backend)
+        stepTime = backend.now()
+        cardList, colorHome = recognizeWhenReady(backend, recognizer, detectColorHome)
+        timings["recognize"] += backend.now() - stepTime
+        stepTime = backend.now()
+        chain = solutionChain(solveBoard(cardList, colorHome))
+        timings["solve"] += backend.now() - stepTime
+        for preState, state in chain:
+            stepTime = backend.now()
+            executeMove(preState, state)
+            if state.autoRemoveTimes > 0: waitForStable(backend, expectChange=True)
+            timings["execute"] += backend.now() - stepTime
+        solved += len(chain) > 0
+        deals += 1
+        if verbose:
+            elapsed = backend.now() - startTime
+            print(f"已完成 {deals} 局，解出 {solved} 局，每小时 {deals*3600/elapsed:.1f} 局")
+    elapsed = backend.now() - startTime
+    return {"deals": deals, "solved": solved, "elapsed": elapsed,
+            "dealsPerHour": deals*3600/elapsed if elapsed > 0 else 0.0, "timings": timings}
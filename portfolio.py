@@ -0,0 +1,110 @@
+""" 多进程组合求解
+同一局同时用多种不同配置的搜索（不同的优先级权重、同分规则、随机种子或搜索策略）在各自的进程中求解，
+任意一个先找到方案就立即返回，并通知其余配置停止搜索。不同配置在不同牌局上各有所长，组合起来能显著提高求解率，
+也能降低单局耗时的长尾。
+
+进程池在第一次求解时创建并一直保留（Windows 上启动子进程要重新导入模块，代价比一次求解还高），
+各局之间复用；停止信号是进程间共享的 Event，子进程中的搜索通过 CancelToken 检查它，在 64 次迭代内结束。
+进程数改变时重建进程池，程序退出时（或调用 shutdownPool）关闭。
+
+用法：
+    state = solvePortfolio(cardList, colorHome)              # 默认配置，进程数为 CPU 核数
+    state = solvePortfolio(cardList, colorHome, workers=4, stats=stats)
+    stats["winner"]                                          # 获胜的配置名
+"""
+import atexit
+import multiprocessing
+import os
+import time
+
+from solver import State, replayMoves, TRAY_COUNT
+from search import solve, solutionMoves, cachedSolution, CancelToken, GreedySearch, WeightedAStar, BeamSearch
+
+# 默认的组合：(名称, 搜索策略)，按重要性排序，进程数不足时先运行靠前的配置
+DEFAULT_PORTFOLIO = [
+    ("greedy", GreedySearch()),
+    ("astar-1.5", WeightedAStar(1.5)),
+    ("greedy-stack", GreedySearch(stackWeight=1.5)),
+    ("greedy-random-1", GreedySearch(tieBreak="random", seed=1)),
+    ("astar-3", WeightedAStar(3.0)),
+    ("greedy-turn", GreedySearch(turnWeight=0.3, tieBreak="fifo")),
+    ("beam-128", BeamSearch(128)),
+    ("greedy-random-2", GreedySearch(tieBreak="random", seed=2)),
+]
+
+pool = None        # 常驻的进程池，由 getPool 创建
+poolWorkers = 0    # 进程池的进程数
+stopEvent = None   # 通知各配置停止搜索的进程间 Event
+workerCancel = None # 子进程中包装 stopEvent 的 CancelToken
+
+def initWorker(event): # 子进程初始化：保存停止信号
+    global workerCancel
+    workerCancel = CancelToken(event)
+
+def getPool(workers): # 取得常驻的进程池，进程数不同时重建
+    global pool, poolWorkers, stopEvent
+    if pool is not None and poolWorkers == workers: return pool
+    shutdownPool()
+    stopEvent = multiprocessing.Event()
+    pool = multiprocessing.Pool(workers, initializer=initWorker, initargs=(stopEvent,))
+    poolWorkers = workers
+    return pool
+
+def shutdownPool(): # 关闭常驻的进程池
+    global pool, poolWorkers
+    if pool is None: return
+    pool.terminate()
+    pool.join()
+    pool, poolWorkers = None, 0
+
+atexit.register(shutdownPool)
+
+def runMember(job): # 在子进程中用一种配置求解，返回 (名称, 动作列表或 None, 统计)
+    name, strategy, initialTrays, colorHome, maxIterations, timeLimit = job
+    stats = {}
+    state = solve(initialTrays, colorHome, maxIterations=maxIterations, timeLimit=timeLimit, verbose=False,
+                  stats=stats, strategy=strategy, cancel=workerCancel)
+    return name, (solutionMoves(state) if state is not None else None), stats
+
+def solvePortfolio(initialTrays:list[list[str]], colorHome:dict, portfolio = None, workers = None,
+                   maxIterations = 1e4, timeLimit = None, verbose = True, stats = None, cache = None):
+    # 返回与 solve 相同的最终局面（prevState 链完整）或 None；stats 中写入获胜配置 winner 和各配置的统计 members
+    # cache 为 SolutionCache 时先查缓存（命中时 winner 为 "cache"），找到新方案后写回
+    if cache is not None and len(initialTrays) == TRAY_COUNT:
+        result = cachedSolution(cache, State(customTrays=initialTrays, initColorHome=colorHome), initialTrays, colorHome)
+        if result is not None:
+            if verbose: print("从缓存中找到必胜方案")
+            if stats is not None:
+                stats.update(winner="cache", members={}, iterations=0, statesExplored=0, elapsed=0.0)
+            return result
+    if portfolio is None: portfolio = DEFAULT_PORTFOLIO
+    if workers is None: workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(portfolio)))
+    startTime = time.perf_counter()
+    winner = winningMoves = None
+    members = {}
+    if len(initialTrays) == TRAY_COUNT:
+        jobs = [(name, strategy, initialTrays, colorHome, maxIterations, timeLimit) for name, strategy in portfolio]
+        getPool(workers)
+        stopEvent.clear()
+        for name, moves, memberStats in pool.imap_unordered(runMember, jobs):
+            members[name] = memberStats
+            if moves is not None and winner is None:
+                winner, winningMoves = name, moves
+                stopEvent.set() # 其余配置很快结束，等它们返回后进程池即可用于下一局
+    elif verbose:
+        print("当前局面输入错误")
+    result = None
+    if winningMoves is not None: # 在本进程中重放动作，重建完整的 prevState 链
+        result = replayMoves(State(customTrays=initialTrays, initColorHome=colorHome), winningMoves)
+        if cache is not None: cache.store(initialTrays, colorHome, winningMoves)
+    if verbose:
+        if result is not None: print("由", winner, "找到必胜方案，共", len(winningMoves), "步")
+        else: print("所有配置都没找到必胜方案，重开吧")
+    if stats is not None:
+        stats["winner"] = winner
+        stats["members"] = members
+        stats["iterations"] = members[winner]["iterations"] if winner is not None else sum(m["iterations"] for m in members.values())
+        stats["statesExplored"] = sum(m["statesExplored"] for m in members.values())
+        stats["elapsed"] = time.perf_counter() - startTime
+    return result
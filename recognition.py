@@ -0,0 +1,144 @@
+""" 卡牌识别
+把所有卡牌模板叠成一个 NumPy 数组，一次性从截图中取出 CNTW×CNTH 个格子，用批量的归一化互相关
+(与 cv2.TM_CCOEFF_NORMED 相同：各通道减去均值后求相关，再除以两者的范数) 给每个格子和每个模板打分，
+代替逐格逐模板调用 cv2.matchTemplate。同时给出每个格子的置信度。
+
+renderBoard 可以用 assets/ 中的模板合成一张棋盘截图，用于离线验证和测速：
+    python recognition.py --deals 20
+"""
+import os
+import time
+
+import cv2
+import numpy as np
+
+from layout import ITMH, ITMW, DISH, DISW, BEGH, BEGW, CNTH, CNTW, HOME_PROBE_Y, HOME_PROBE_X, HOME_COLORS, SCREEN_REGION
+from solver import SUITS, DRAGONS
+
+ASSET_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
+TEMPLATE_NAMES = [suit+str(value) for value in range(1,10) for suit in SUITS] + list(DRAGONS) + ["F", "empty"]
+MATCH_THRESHOLD = 0.8 # 低于该分数的格子视为没有牌
+
+def loadTemplates(assetDir = ASSET_DIR): # 读取全部模板，返回 (名称列表, 形状为 (K, ITMH, ITMW, 3) 的 uint8 数组)
+    templates = []
+    for name in TEMPLATE_NAMES:
+        template = cv2.imread(os.path.join(assetDir, f"{name}.png"))
+        if template is None:
+            raise FileNotFoundError(f"找不到卡牌模板: {name}.png")
+        templates.append(template)
+    return list(TEMPLATE_NAMES), np.stack(templates)
+
+def centerAndNormalize(patches): # (N, H, W, C) -> (N, H*W*C)，各通道减去均值后除以整体范数；无纹理的格子保持为 0
+    patches = patches.astype(np.float32)
+    patches -= patches.mean(axis=(1, 2), keepdims=True)
+    flat = patches.reshape(len(patches), -1)
+    norms = np.linalg.norm(flat, axis=1, keepdims=True)
+    return np.divide(flat, norms, out=np.zeros_like(flat), where=norms > 1e-6)
+
+class CardRecognizer: # 批量卡牌识别器，构造时预处理全部模板
+    def __init__(self, assetDir = ASSET_DIR, threshold = MATCH_THRESHOLD):
+        self.names, templates = loadTemplates(assetDir)
+        self.emptyIndex = self.names.index("empty")
+        self.threshold = threshold
+        self.templateMatrix = centerAndNormalize(templates).T # (D, K)
+        # 每个格子在截图中的行、列下标，用于一次性取出所有格子
+        self.rows = (BEGH + np.arange(CNTH)*DISH)[:, None] + np.arange(ITMH) # (CNTH, ITMH)
+        self.cols = (BEGW + np.arange(CNTW)*DISW)[:, None] + np.arange(ITMW) # (CNTW, ITMW)
+
+    def extractCells(self, img): # 截图 -> 形状为 (CNTW, CNTH, ITMH, ITMW, 3) 的格子数组，按列（牌堆）排列
+        return img[self.rows[None, :, :, None], self.cols[:, None, None, :]]
+
+    def scoreCells(self, cells): # 格子 (..., ITMH, ITMW, 3) -> 每个格子对每个模板的分数 (..., K)
+        shape = cells.shape[:-3]
+        scores = centerAndNormalize(cells.reshape((-1,) + cells.shape[-3:])) @ self.templateMatrix
+        return scores.reshape(shape + (len(self.names),))
+
+    def recognize(self, img): # 返回 (cardList, confidence)；confidence[nw][nh] 为该格最佳模板的分数
+        scores = self.scoreCells(self.extractCells(img))
+        best = scores.argmax(axis=-1)
+        confidence = scores.max(axis=-1)
+        cardList = []
+        for nw in range(CNTW):
+            cardSubGroup = []
+            for nh in range(CNTH):
+                if best[nw, nh] != self.emptyIndex and confidence[nw, nh] > self.threshold:
+                    cardSubGroup.append(self.names[best[nw, nh]])
+            cardList.append(cardSubGroup)
+        return cardList, confidence
+
+def recognizeCardsLegacy(img, assetDir = ASSET_DIR): # 原来的逐格 cv2.matchTemplate 实现，用于核对结果与测速
+    names, templates = loadTemplates(assetDir)
+    cardList = []
+    for nw in range(CNTW):
+        cardSubGroup = []
+        for nh in range(CNTH):
+            x, y = BEGW + nw*DISW, BEGH + nh*DISH
+            curDict = {}
+            for (cardName, cardImg) in zip(names, templates):
+                res = cv2.matchTemplate(img[y:y+ITMH, x:x+ITMW], cardImg, cv2.TM_CCOEFF_NORMED)
+                _, maxVal, _, _ = cv2.minMaxLoc(res)
+                curDict[cardName] = maxVal
+            maxCard = max(curDict, key=curDict.get)
+            if maxCard != "empty" and curDict[maxCard] > MATCH_THRESHOLD:
+                cardSubGroup.append(maxCard)
+        cardList.append(cardSubGroup)
+    return cardList
+
+def detectColorHome(img): # 读取右上角三个收牌区的颜色，返回各花色所在的收牌区序号
+    colorHome = {'r':None, 'b':None, 'g':None}
+    for i in range(3):
+        pixel = img[HOME_PROBE_Y, HOME_PROBE_X+i*DISW]
+        for suit, color in HOME_COLORS.items():
+            if np.array_equal(pixel, color):
+                colorHome[suit] = i
+    return colorHome
+
+def renderBoard(cardList, colorHome = None, assetDir = ASSET_DIR, noise = 0.0, seed = 0, templates = None):
+    # 用模板合成一张截图：cardList[nw] 为第 nw 堆从上到下的牌名，空位画 empty 模板；noise 为高斯噪声的标准差
+    if templates is None: templates = dict(zip(*loadTemplates(assetDir)))
+    img = np.full((SCREEN_REGION[3], SCREEN_REGION[2], 3), 40, dtype=np.uint8)
+    for nw in range(CNTW):
+        for nh in range(CNTH):
+            name = cardList[nw][nh] if nw < len(cardList) and nh < len(cardList[nw]) else "empty"
+            y, x = BEGH + nh*DISH, BEGW + nw*DISW
+            img[y:y+ITMH, x:x+ITMW] = templates[name]
+    if noise > 0:
+        rng = np.random.default_rng(seed)
+        img = np.clip(img + rng.normal(0, noise, img.shape), 0, 255).astype(np.uint8)
+    for suit, home in (colorHome or {}).items():
+        if home is not None:
+            img[HOME_PROBE_Y, HOME_PROBE_X+home*DISW] = HOME_COLORS[suit]
+    return img
+
+def main(argv = None): # 在合成棋盘上核对批量识别与原实现的结果，并比较耗时
+    import argparse
+    from dealgen import generateDeal
+    parser = argparse.ArgumentParser(description="在合成棋盘上验证并测速卡牌识别")
+    parser.add_argument("--deals", type=int, default=20, help="合成的牌局数")
+    parser.add_argument("--noise", type=float, default=8.0, help="高斯噪声标准差")
+    args = parser.parse_args(argv)
+
+    recognizer = CardRecognizer()
+    templates = dict(zip(recognizer.names, loadTemplates()[1]))
+    batchTime = legacyTime = 0.0
+    mismatches = 0
+    lowestConfidence = 1.0
+    for seed in range(args.deals):
+        deal = generateDeal(seed)
+        img = renderBoard(deal, noise=args.noise, seed=seed, templates=templates)
+        startTime = time.perf_counter()
+        cardList, confidence = recognizer.recognize(img)
+        batchTime += time.perf_counter() - startTime
+        startTime = time.perf_counter()
+        legacyList = recognizeCardsLegacy(img)
+        legacyTime += time.perf_counter() - startTime
+        lowestConfidence = min(lowestConfidence, float(confidence.min()))
+        if cardList != deal or legacyList != deal:
+            mismatches += 1
+            print(f"种子 {seed} 识别结果不一致：批量 {cardList == deal}，原实现 {legacyList == deal}")
+    print(f"{args.deals} 局，不一致 {mismatches} 局，最低置信度 {lowestConfidence:.3f}")
+    print(f"批量识别平均 {batchTime/args.deals*1000:.2f} ms，原实现平均 {legacyTime/args.deals*1000:.2f} ms，"
+          f"加速 {legacyTime/max(batchTime, 1e-9):.1f} 倍")
+
+if __name__ == '__main__':
+    main()
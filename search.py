@@ -0,0 +1,483 @@
+""" 深圳IO 卡牌游戏求解器 - 搜索
+solve 负责输入检查与统计，具体的搜索由可替换的搜索策略完成：
+    greedy   按 State.priority 的贪心最佳优先搜索（原有方式）
+    astar    加权 A*，f = 步数 + weight * 剩余块数，weight 越小方案越短、搜索越慢
+    idastar  迭代加深 A*，只保留当前路径和一个有上限的置换表，内存占用小
+    beam     集束搜索，每一层只保留 width 个最好的局面
+所有策略共用同一套走法：先尝试牌堆之间的移动，没有新局面时才把牌移入槽位。
+可以用 benchmark.py --strategy 比较各策略的速度、求解率和方案长度。
+
+内存：greedy / astar / beam 把搜索树记在 SearchArena 中（每个结点只有父结点序号、动作和步数），
+子局面生成后即断开 prevState，已展开的局面可以被回收，找到方案后再按动作重放出完整的局面链。
+tableSize 不为 None 时，已访问集合换成固定大小的 TranspositionTable，内存上限与迭代次数无关（只按局面键判重）。
+
+搜索过程中记录剩余牌数最少的局面（SearchContext.best），partial 为 True 时没找到方案也返回它。
+cancel 为 CancelToken 时，可以在其他线程中调用 cancel() 提前结束搜索。按时间预算多轮重启的求解见 anytime.py。
+
+必败局面剪枝（pruneDeadEnds，默认开启）：生成子局面时丢掉 State.isStuck() 的局面（槽位已满、只能撤销上一步），它们不再占用队列和迭代次数，剪掉的数量记在统计中。
+
+残局（endgame 为 EndgameTable 时）：子局面的剩余牌数降到残局表的 threshold 以下时查表或穷举（见 endgame.py），
+必败的子局面直接剪掉；必胜时记下 (父局面, 之后的动作) 并结束搜索，由 solve 接上最短的收尾方案。
+
+进度与剖析：progress 为回调函数时，每 PROGRESS_INTERVAL 次迭代以字典形式收到一次进度（见 SearchContext.snapshot），
+可以直接写成 JSON；profile 为 instrument.SolverProfile 时改用 InstrumentedContext，分阶段记录耗时与分支情况。
+"""
+import heapq
+import random
+import threading
+import time
+from queue import PriorityQueue
+
+from solver import State, VisitedStates, TranspositionTable, SearchArena, replayMoves, TRAY_COUNT
+from endgame import LOST
+
+PROGRESS_INTERVAL = 1000 # 每隔多少次迭代输出一次进度
+
+class CancelToken: # 取消句柄：在任意线程中调用 cancel() 后，使用它的搜索会在 64 次迭代内结束
+    def __init__(self, event = None):
+        # event 默认为新的 threading.Event；传入 multiprocessing.Event 时可以跨进程取消（见 portfolio.py）
+        self.event = threading.Event() if event is None else event
+
+    def cancel(self):
+        self.event.set()
+
+    @property
+    def cancelled(self):
+        return self.event.is_set()
+
+class SearchContext: # 一次求解的迭代/时间上限与统计数据，由 solve 创建并交给搜索策略
+    def __init__(self, maxIterations = 1e4, timeLimit = None, exactDuplicates = False, verbose = True, tableSize = None,
+                 cancel = None, pruneDeadEnds = True, endgame = None, progress = None):
+        # tableSize 为置换表的条目上限，None 表示用不限大小的 VisitedStates；cancel 为 CancelToken 或 None
+        # endgame 为 EndgameTable 或 None；progress 为进度回调，参数为 snapshot() 的结果
+        self.maxIterations = maxIterations
+        self.startTime = time.perf_counter()
+        self.deadline = None if timeLimit is None else self.startTime + timeLimit
+        self.exactDuplicates = exactDuplicates
+        self.verbose = verbose
+        self.tableSize = tableSize
+        self.cancel = cancel
+        self.pruneDeadEnds = pruneDeadEnds
+        self.endgame = endgame
+        self.onProgress = progress
+        self.reporting = verbose or progress is not None
+        self.finish = None       # 残局表证明必胜时为 (父局面, 从父局面到获胜的动作列表)
+        self.arena = SearchArena()
+        self.best = None         # 目前剩余牌数最少的局面，由 solve 设为初始局面
+        self.iterations = 0      # 已展开的局面数
+        self.statesExplored = 0  # 已生成并记录的局面数
+        self.timedOut = False
+        self.cancelled = False
+        self.stuckPruned = 0     # 生成时丢掉的只能撤销的子局面数
+        self.endgamePruned = 0   # 残局表判为必败而丢掉的子局面数
+
+    def spend(self): # 记一次展开，预算用完、被取消或已由残局表找到方案时返回 False
+        if self.finish is not None: return False
+        self.iterations += 1
+        if self.iterations >= self.maxIterations: return False
+        if self.iterations % 64 == 0:
+            if self.deadline is not None and time.perf_counter() > self.deadline:
+                self.timedOut = True
+                return False
+            if self.cancel is not None and self.cancel.cancelled:
+                self.cancelled = True
+                return False
+        return True
+
+    def expand(self, state:State, isNew): # 与 expandState 相同，另外按 pruneDeadEnds 和残局表剪掉必败的子局面
+        if not self.pruneDeadEnds and self.endgame is None: return expandState(state, isNew)
+        pruneDeadEnds, endgame = self.pruneDeadEnds, self.endgame
+        def accept(child):
+            if self.finish is not None or not isNew(child): return False
+            if pruneDeadEnds and child.isStuck():
+                self.stuckPruned += 1
+                return False
+            if endgame is not None and endgame.covers(child):
+                distance = endgame.distance(child) # 无法穷举时为 None，照常搜索
+                if distance == LOST:
+                    self.endgamePruned += 1
+                    return False
+                moves = endgame.finishingMoves(child) if distance is not None else None
+                if moves is not None:
+                    self.finish = (state, [child.action] + moves)
+                    return False
+            return True
+        children = expandState(state, accept)
+        return [] if self.finish is not None else children
+
+    def observe(self, children): # 更新剩余牌数最少的局面
+        best = self.best
+        for child in children:
+            if child.remainingCards < best.remainingCards: best = child
+        self.best = best
+
+    def visitedSet(self): # 新建已访问集合
+        if self.tableSize is None: return VisitedStates(self.exactDuplicates)
+        return TranspositionTable(self.tableSize)
+
+    def attach(self, parent:State, children): # 把子局面记入 arena 并断开 prevState，同时更新剩余牌数最少的局面
+        add, node, best = self.arena.add, parent.node, self.best
+        for child in children:
+            child.node = add(node, child.action, child.turn)
+            child.prevState = None
+            if child.remainingCards < best.remainingCards: best = child
+        self.best = best
+
+    def rebuild(self, initialState:State, state:State): # 由 arena 中的路径重放出 prevState 链完整的局面
+        if state is None or state.node <= 0: return state # 初始局面，或未使用 arena 的策略
+        return replayMoves(initialState, self.arena.path(state.node))
+
+    def progress(self, frontierSize, score): # 每 PROGRESS_INTERVAL 次迭代输出一次进度，并交给进度回调
+        if self.reporting and self.iterations % PROGRESS_INTERVAL == 0:
+            if self.verbose:
+                print("寻找方案中，已进行", self.iterations,"次迭代，已探索",self.statesExplored,"个状态，队列中还有",frontierSize,"个状态","当前堆顶优先级",score)
+            if self.onProgress is not None: self.onProgress(self.snapshot(frontierSize, score))
+
+    def snapshot(self, frontierSize, score): # 当前进度，所有值都可以直接写成 JSON
+        return {
+            "iterations": self.iterations,
+            "statesExplored": self.statesExplored,
+            "frontier": frontierSize,
+            "score": score,
+            "elapsed": time.perf_counter() - self.startTime,
+            "bestRemaining": self.best.remainingCards if self.best is not None else None,
+            "stuckPruned": self.stuckPruned,
+            "endgamePruned": self.endgamePruned,
+        }
+
+class InstrumentedContext(SearchContext): # 分阶段计时的 SearchContext，profile 为 instrument.SolverProfile
+    def __init__(self, profile, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.profile = profile
+
+    def expand(self, state:State, isNew): # 已访问集合的查询计入 hashing，其余展开开销计入 expand
+        profile, counters = self.profile, self.profile.counters
+        def timedIsNew(child):
+            if profile.call("hashing", isNew, child): return True
+            counters["duplicates"] += 1
+            return False
+        children = profile.call("expand", SearchContext.expand, self, state, timedIsNew)
+        counters["expansions"] += 1
+        counters["accepted"] += len(children)
+        return children
+
+    def attach(self, parent:State, children):
+        self.profile.call("arena", SearchContext.attach, self, parent, children)
+
+    def snapshot(self, frontierSize, score):
+        result = super().snapshot(frontierSize, score)
+        result["profile"] = self.profile.toDict(functions=0)
+        return result
+
+def expandState(state:State, isNew): # 生成 state 的子局面；牌堆动作没有产生新局面时才尝试移入槽位
+    cls = type(state) # 子局面与父局面同类（剖析时为 InstrumentedState）
+    children = [child for child in (cls(state, action) for action in state.getValidTrayActions()) if isNew(child)]
+    if len(children) == 0:
+        children = [child for child in (cls(state, action) for action in state.getValidSlotActions()) if isNew(child)]
+    return children
+
+class SearchStrategy: # 搜索策略基类，search 返回 remainingCards 为 0 的局面或 None
+    name = ""
+    exactDuplicates = True # 是否支持 exactDuplicates（已访问集合在键相同时再比较精确局面）
+
+    def search(self, initialState:State, context:SearchContext):
+        raise NotImplementedError
+
+class GreedySearch(SearchStrategy): # 贪心最佳优先搜索，按 State.calcPriority 排序
+    name = "greedy"
+    TIE_BREAKS = (None, "fifo", "lifo", "random")
+
+    def __init__(self, turnWeight = 0.1, stackWeight = 0.9, tieBreak = None, seed = None):
+        # turnWeight/stackWeight 为优先级中步数与已叠好牌数的权重；tieBreak 为同分时的顺序：
+        # None 在默认权重下与原来相同（由堆决定），其他权重下与 fifo 相同；fifo/lifo 先进先出/后进先出，random 按 seed 随机
+        # 除 random 外结果都是确定的
+        if tieBreak not in self.TIE_BREAKS:
+            raise ValueError(f"未知的同分规则: {tieBreak}")
+        self.turnWeight = turnWeight
+        self.stackWeight = stackWeight
+        self.tieBreak = tieBreak
+        self.seed = seed
+
+    def search(self, initialState, context):
+        if (self.turnWeight, self.stackWeight, self.tieBreak) == (0.1, 0.9, None):
+            return self.searchDefault(initialState, context)
+        turnWeight, stackWeight, tieBreak = self.turnWeight, self.stackWeight, self.tieBreak
+        rng = random.Random(self.seed)
+        counter = 0
+        heap = [(initialState.priority, 0, initialState)]
+        visitedStates = context.visitedSet(); visitedStates.add(initialState)
+        try:
+            while heap:
+                priority, _, curState = heapq.heappop(heap)
+                if curState.remainingCards == 0: return curState
+                children = context.expand(curState, visitedStates.add)
+                context.attach(curState, children)
+                for child in children:
+                    counter += 1
+                    tie = -counter if tieBreak == "lifo" else rng.random() if tieBreak == "random" else counter
+                    heapq.heappush(heap, (child.calcPriority(turnWeight, stackWeight), tie, child))
+                context.statesExplored = len(visitedStates)
+                context.progress(len(heap), priority)
+                if not context.spend(): return None
+            return None
+        finally:
+            context.statesExplored = len(visitedStates)
+
+    def searchDefault(self, initialState, context): # 默认参数：直接按构造时算好的 State.priority 排序
+        q = PriorityQueue(); q.put(initialState)
+        visitedStates = context.visitedSet(); visitedStates.add(initialState)
+        try:
+            while not q.empty():
+                curState = q.get()
+                if curState.remainingCards == 0: return curState
+                children = context.expand(curState, visitedStates.add)
+                context.attach(curState, children)
+                for child in children:
+                    q.put(child)
+                context.statesExplored = len(visitedStates)
+                context.progress(q.qsize(), curState.priority)
+                if not context.spend(): return None
+            return None
+        finally:
+            context.statesExplored = len(visitedStates)
+
+class WeightedAStar(SearchStrategy): # 加权 A*：f = g + weight*h，g 为步数，h 为剩余块数
+    name = "astar"
+    exactDuplicates = False # 按局面键记录最少步数
+
+    def __init__(self, weight = 1.5):
+        self.weight = weight
+
+    def search(self, initialState, context):
+        weight = self.weight
+        if context.tableSize is None:
+            bestTurn = {initialState.key: 0} # 局面键 -> 到达该局面的最少步数
+            def isNew(child):
+                known = bestTurn.get(child.key)
+                if known is not None and known <= child.turn: return False
+                bestTurn[child.key] = child.turn
+                return True
+            bestKnown = bestTurn.get
+        else:
+            bestTurn = TranspositionTable(context.tableSize); bestTurn.improve(initialState)
+            isNew = bestTurn.improve
+            def bestKnown(key, default):
+                known = bestTurn.depthOf(key)
+                return default if known is None else known
+        counter = 0 # 同分时先进先出，保证结果可复现
+        h = initialState.countBlocks()
+        heap = [(weight*h, h, counter, initialState)]
+        try:
+            while heap:
+                f, _, _, curState = heapq.heappop(heap)
+                if bestKnown(curState.key, curState.turn) < curState.turn: continue # 已有更短的路径
+                if curState.remainingCards == 0: return curState
+                children = context.expand(curState, isNew)
+                context.attach(curState, children)
+                for child in children:
+                    counter += 1
+                    h = child.countBlocks()
+                    heapq.heappush(heap, (child.turn + weight*h, h, counter, child))
+                context.statesExplored = len(bestTurn)
+                context.progress(len(heap), f)
+                if not context.spend(): return None
+            return None
+        finally:
+            context.statesExplored = len(bestTurn)
+
+class IDAStar(SearchStrategy): # 迭代加深 A*：按 f 上限做深度优先搜索，每轮把上限提高到本轮超出的最小 f
+    name = "idastar"
+    exactDuplicates = False # 置换表只保存局面键
+
+    def __init__(self, weight = 2.0, tableSize = 1 << 16):
+        self.weight = weight
+        self.tableSize = tableSize # 置换表条目上限，内存占用与之成正比
+
+    def search(self, initialState, context):
+        weight = self.weight
+        table = TranspositionTable(self.tableSize) # 本轮中到达各局面的最少步数
+        onPath = set()
+        budgetLeft = True
+        nextBound = 0.0
+        countBlocks = type(initialState).countBlocks
+
+        def dfs(state, bound):
+            nonlocal budgetLeft, nextBound
+            f = state.turn + weight*state.countBlocks()
+            if f > bound:
+                nextBound = min(nextBound, f)
+                return None
+            if state.remainingCards == 0: return state
+            if not budgetLeft: return None
+            if not context.spend():
+                budgetLeft = False
+                return None
+            onPath.add(state.key)
+            def isNew(child):
+                return child.key not in onPath and table.improve(child)
+            children = context.expand(state, isNew)
+            context.statesExplored += len(children)
+            context.observe(children)
+            children.sort(key=countBlocks) # 先走剩余块数少的分支
+            context.progress(len(onPath), bound)
+            for child in children:
+                result = dfs(child, bound)
+                if result is not None or not budgetLeft: break
+            onPath.discard(state.key)
+            return result if children else None
+
+        bound = weight*initialState.countBlocks()
+        while budgetLeft:
+            nextBound = float("inf")
+            table.clear()
+            table.improve(initialState)
+            result = dfs(initialState, bound)
+            if result is not None: return result
+            if nextBound == float("inf"): return None # 整个搜索空间都已穷尽
+            bound = nextBound
+        return None
+
+class BeamSearch(SearchStrategy): # 集束搜索：逐层展开，每层按 State.priority 保留最好的 width 个局面
+    name = "beam"
+
+    def __init__(self, width = 64):
+        self.width = width
+
+    def search(self, initialState, context):
+        if initialState.remainingCards == 0: return initialState
+        visitedStates = context.visitedSet(); visitedStates.add(initialState)
+        layer = [initialState]
+        try:
+            while layer:
+                nextLayer = []
+                for curState in layer:
+                    children = context.expand(curState, visitedStates.add)
+                    context.attach(curState, children)
+                    for child in children:
+                        if child.remainingCards == 0: return child
+                        nextLayer.append(child)
+                    context.statesExplored = len(visitedStates)
+                    context.progress(len(nextLayer), curState.priority)
+                    if not context.spend(): return None
+                nextLayer.sort()
+                layer = nextLayer[:self.width]
+            return None
+        finally:
+            context.statesExplored = len(visitedStates)
+
+STRATEGIES = {cls.name: cls for cls in (GreedySearch, WeightedAStar, IDAStar, BeamSearch)}
+
+def makeStrategy(strategy = "greedy", weight = None, width = None): # 由名称和可选参数构造搜索策略
+    if isinstance(strategy, SearchStrategy): return strategy
+    if strategy not in STRATEGIES:
+        raise ValueError(f"未知的搜索策略: {strategy}，可选: {', '.join(STRATEGIES)}")
+    cls = STRATEGIES[strategy]
+    if cls is BeamSearch: return cls() if width is None else cls(width)
+    if cls in (WeightedAStar, IDAStar): return cls() if weight is None else cls(weight)
+    return cls()
+
+def cachedSolution(cache, initialState:State, initialTrays, colorHome): # 从方案缓存中取出并验证方案，返回最终局面或 None
+    moves = cache.lookup(initialTrays, colorHome)
+    if moves is None: return None
+    state = replayMoves(initialState, moves, check=True)
+    if state is None or state.remainingCards != 0: return None # 缓存内容与牌局不符
+    return state
+
+def solve(initialTrays:list[list[str]], colorHome:dict, exactDuplicates = False, maxIterations = 1e4,
+          timeLimit = None, verbose = True, stats = None, strategy = "greedy", cache = None, tableSize = None,
+          cancel = None, partial = False, pruneDeadEnds = True, endgame = None, progress = None, profile = None):
+    # exactDuplicates 为 True 时，局面键相同的局面再比较精确局面；只有 greedy 与 beam 支持，其余策略抛出 ValueError
+    # timeLimit 为秒数，超时与超过迭代次数一样返回 None；stats 为字典时写入迭代次数、已探索状态数和耗时
+    # strategy 为 STRATEGIES 中的名称或 SearchStrategy 实例
+    # cache 为 SolutionCache 时先查缓存，找到新方案后写回
+    # tableSize 为已访问集合的条目上限（固定大小的置换表，只保存局面键，不能与 exactDuplicates 同时使用），None 表示不限
+    # cancel 为 CancelToken 时可以从其他线程取消，取消后与超时一样处理
+    # partial 为 True 时，没找到方案也返回剩余牌数最少的局面（prevState 链完整，remainingCards 不为 0）
+    # pruneDeadEnds 为 True 时，生成子局面时丢掉 isStuck() 的局面，剪掉的数量写入 stats["stuckPruned"]
+    # endgame 为 EndgameTable 时，剩余牌数不超过其 threshold 的局面由残局表精确求解；
+    # stats["unsolvable"] 只在残局表覆盖初始局面且判定必败时为 True，没有残局表时总是 False
+    # progress 为回调函数时，每 PROGRESS_INTERVAL 次迭代收到一次进度字典
+    # profile 为 instrument.SolverProfile 时分阶段计时，结果累加到 profile 中并写入 stats["profile"]
+    searchStrategy = makeStrategy(strategy)
+    if exactDuplicates and not searchStrategy.exactDuplicates:
+        raise ValueError(f"搜索策略 {searchStrategy.name} 只按局面键判重，不支持 exactDuplicates")
+    if exactDuplicates and tableSize is not None:
+        raise ValueError("固定大小的置换表只保存局面键，不能与 exactDuplicates 同时使用")
+    args = (maxIterations, timeLimit, exactDuplicates, verbose, tableSize, cancel, pruneDeadEnds, endgame, progress)
+    if profile is None:
+        context = SearchContext(*args)
+        stateClass = State
+    else:
+        context = InstrumentedContext(profile, *args)
+        stateClass = profile.stateClass
+        profile.start()
+    cacheHit = False
+    unsolvable = False
+    try:
+        if len(initialTrays) != TRAY_COUNT:
+            if verbose: print("当前局面输入错误")
+            return None
+        zeroTag = True
+        for tray in initialTrays:
+            if len(tray) != 0:
+                zeroTag = False
+                break
+        if zeroTag and verbose:
+            print("当前局面输入错误，请求人工介入")
+        initialState = stateClass(customTrays=initialTrays, initColorHome=colorHome)
+        if cache is not None:
+            result = cachedSolution(cache, initialState, initialTrays, colorHome)
+            if result is not None:
+                cacheHit = True
+                if verbose: print("从缓存中找到必胜方案")
+                return result
+        initialState.node = context.arena.add(-1, 0, 0)
+        context.best = initialState
+        if endgame is not None and endgame.covers(initialState):
+            moves = endgame.finishingMoves(initialState)
+            if moves is not None: context.finish = (initialState, moves)
+            elif endgame.distance(initialState) == LOST:
+                unsolvable = True
+                if verbose: print("牌局必败，重开吧")
+                return initialState if partial else None
+        if context.finish is None:
+            if profile is None: result = searchStrategy.search(initialState, context)
+            else: result = profile.call("queue", searchStrategy.search, initialState, context)
+            result = context.rebuild(initialState, result)
+        if context.finish is not None: # 残局表找到的方案：重建到父局面的路径，再接上收尾动作
+            parent, moves = context.finish
+            result = replayMoves(context.rebuild(initialState, parent), moves)
+        if result is not None and cache is not None:
+            cache.store(initialTrays, colorHome, solutionMoves(result))
+        if verbose:
+            if result is not None: print("经过", context.iterations, "次迭代，已找到必胜方案")
+            elif context.cancelled: print("搜索被取消，已进行", context.iterations, "次迭代")
+            elif context.timedOut: print("超过时间限制，已进行", context.iterations, "次迭代")
+            else: print("没找到必胜方案，重开吧")
+        if result is None and partial:
+            result = context.rebuild(initialState, context.best)
+            if verbose: print("剩余牌数最少的局面还剩", result.remainingCards, "张牌")
+        return result
+    finally:
+        if profile is not None: profile.stop()
+        if stats is not None:
+            stats["iterations"] = context.iterations
+            stats["statesExplored"] = context.statesExplored
+            stats["elapsed"] = time.perf_counter() - context.startTime
+            stats["strategy"] = searchStrategy.name
+            stats["cacheHit"] = cacheHit
+            stats["cancelled"] = context.cancelled
+            stats["unsolvable"] = unsolvable
+            stats["stuckPruned"] = context.stuckPruned
+            stats["endgameSolved"] = context.finish is not None
+            stats["endgamePruned"] = context.endgamePruned
+            stats["bestRemaining"] = 0 if cacheHit else context.best.remainingCards if context.best is not None else None
+            if profile is not None: stats["profile"] = profile.toDict()
+
+def solutionMoves(state:State): # 沿 prevState 回溯得到从初始局面到 state 的动作列表
+    moves = []
+    while state is not None and state.prevState is not None:
+        moves.append(state.action)
+        state = state.prevState
+    moves.reverse()
+    return moves
@@ -0,0 +1,234 @@
+""" 游戏模拟器
+SimulatorBackend 在进程内模拟深圳IO纸牌，供没有显示器和真实游戏的机器使用：
+    - 用 assets/ 中的模板画出棋盘（recognition.renderBoard），发牌和收牌动画期间画面会变化
+    - 把鼠标的拖动和点击换算回牌堆/槽位/收牌区，按游戏规则执行，非法操作和动画期间的操作被忽略并计数
+    - 每次操作后按游戏规则自动收牌
+    - 等待和操作花费的时间记在模拟时钟上，不真正 sleep；识别和求解的计算时间按实际时间计入
+
+    python simulator.py --deals 20
+用完整的流程（识别、求解、执行）玩 20 局，输出每小时局数，并核对每个解出的方案在模拟器中都真的赢了。
+"""
+import argparse
+import time
+
+from backend import Backend, executeMove
+from dealgen import generateDeal
+from layout import DISH, DISW, BEGH, BEGW, CDLTW, POPCOLORLOCATION, DRAGON_BUTTONS, NEW_GAME_BUTTON, SLOT_X, SLOT_Y
+from recognition import renderBoard, loadTemplates
+from solver import SUITS, TRAY_COUNT, SLOT_COUNT
+from timing import CLICK_TIME, DRAG_TIME, COLLECT_TIME
+
+SCREENSHOT_TIME = 0.03  # 一次截图的时间
+DEAL_TIME = 4.0         # 发牌动画时长（估计值）
+HIT_RADIUS = 40         # 点击位置与目标的最大距离
+LOCKED = "X"            # 放了四张龙牌后锁住的槽位
+
+def isNormal(card):
+    return card[0] in SUITS
+
+def canStack(lower, upper): # upper 能否叠在 lower 上：普通牌、花色不同、点数小一
+    return isNormal(lower) and isNormal(upper) and lower[0] != upper[0] and int(lower[1]) == int(upper[1]) + 1
+
+class SimulatorBackend(Backend): # 进程内模拟的游戏，开始新的一局时按顺序使用 generateDeal(seed), generateDeal(seed+1), ...
+    def __init__(self, seed = 0, deals = None):
+        # deals 为牌局列表时按顺序使用这些牌局（用完后循环），否则由 seed 生成
+        self.seed = seed
+        self.deals = deals
+        self.templates = dict(zip(*loadTemplates()))
+        self.offset = 0.0 # 模拟时钟比实际时钟快的秒数
+        self.busyUntil = 0.0 # 动画结束的时间
+        self.dealStart = self.dealEnd = 0.0
+        self.frame = 0
+        self.dealCount = 0
+        self.initialDeal = [[] for _ in range(TRAY_COUNT)]
+        self.trays = [[] for _ in range(TRAY_COUNT)]
+        self.slots = [None]*SLOT_COUNT
+        self.homes = [None]*3 # 每个收牌区的 (花色, 最大点数)
+        self.stats = {"deals": 0, "won": 0, "clicks": 0, "drags": 0, "illegal": 0, "screenshots": 0, "collectRounds": 0}
+
+    # 时钟
+    def now(self):
+        return time.perf_counter() + self.offset
+
+    def sleep(self, seconds):
+        self.offset += seconds
+
+    # 画面
+    def screenshot(self):
+        self.offset += SCREENSHOT_TIME
+        self.stats["screenshots"] += 1
+        now = self.now()
+        if now < self.dealEnd: # 发牌中：按时间比例画出已发的牌
+            dealt = int((now - self.dealStart) / (self.dealEnd - self.dealStart) * 40)
+            trays = [[card for row,card in enumerate(tray) if row*TRAY_COUNT+i < dealt] for i,tray in enumerate(self.initialDeal)]
+        else:
+            trays = self.trays
+        colorHome = {home[0]: i for i,home in enumerate(self.homes) if home is not None}
+        img = renderBoard(trays, colorHome, templates=self.templates)
+        if now < self.busyUntil: # 动画中：画面左上角每一帧都不同
+            self.frame += 1
+            img[:200, :200] = 255 * (self.frame % 2)
+        return img
+
+    # 操作
+    def click(self, x, y):
+        self.offset += CLICK_TIME
+        self.stats["clicks"] += 1
+        if self.now() < self.busyUntil: # 动画期间的操作被忽略
+            self.stats["illegal"] += 1
+            return
+        if self.near(x, y, *NEW_GAME_BUTTON):
+            self.newDeal()
+            return
+        for dragon, (bx, by) in DRAGON_BUTTONS.items():
+            if self.near(x, y, bx, by):
+                if not self.collapse(dragon): self.stats["illegal"] += 1
+                self.autoCollect()
+                return
+        self.stats["illegal"] += 1
+
+    def drag(self, fromX, fromY, toX, toY):
+        self.offset += DRAG_TIME
+        self.stats["drags"] += 1
+        if self.now() < self.busyUntil or not self.move(self.locate(fromX, fromY), self.locate(toX, toY)):
+            self.stats["illegal"] += 1
+            return
+        self.autoCollect()
+
+    @staticmethod
+    def near(x, y, targetX, targetY):
+        return abs(x - targetX) <= HIT_RADIUS and abs(y - targetY) <= HIT_RADIUS
+
+    def locate(self, x, y): # 屏幕坐标 -> ("tray", 序号, 行) / ("slot", 序号) / ("home", 序号) / None
+        for i, (hx, hy) in enumerate(POPCOLORLOCATION):
+            if self.near(x, y, hx, hy): return ("home", i)
+        for i in range(SLOT_COUNT):
+            if self.near(x, y, SLOT_X+i*DISW, SLOT_Y): return ("slot", i)
+        tray = round((x - BEGW - CDLTW) / DISW)
+        if 0 <= tray < TRAY_COUNT and abs(x - (BEGW+tray*DISW+CDLTW)) <= HIT_RADIUS and y >= BEGH:
+            return ("tray", tray, (y - BEGH) // DISH)
+        return None
+
+    # 游戏规则
+    def newDeal(self):
+        deal = self.deals[self.dealCount % len(self.deals)] if self.deals else generateDeal(self.seed + self.dealCount)
+        self.dealCount += 1
+        self.stats["deals"] += 1
+        self.initialDeal = [list(tray) for tray in deal]
+        self.trays = [list(tray) for tray in deal]
+        self.slots = [None]*SLOT_COUNT
+        self.homes = [None]*3
+        self.dealStart = self.now()
+        self.dealEnd = self.busyUntil = self.dealStart + DEAL_TIME
+        self.autoCollect()
+
+    def move(self, src, dst): # 执行一次拖动，不合法时返回 False
+        if src is None or dst is None: return False
+        if src[0] == "tray":
+            tray = self.trays[src[1]]
+            if len(tray) == 0: return False
+            row = min(src[2], len(tray)-1) # 最后一张牌占满下方的位置
+            cards = tray[row:]
+            if any(not canStack(cards[i], cards[i+1]) for i in range(len(cards)-1)): return False
+        elif src[0] == "slot":
+            card = self.slots[src[1]]
+            if card is None or card == LOCKED: return False
+            cards = [card]
+        else:
+            return False
+        if dst[0] == "tray":
+            if src[0] == "tray" and dst[1] == src[1]: return False
+            target = self.trays[dst[1]]
+            if len(target) > 0 and not canStack(target[-1], cards[0]): return False
+            target.extend(cards)
+        elif dst[0] == "slot":
+            if len(cards) != 1 or self.slots[dst[1]] is not None: return False
+            self.slots[dst[1]] = cards[0]
+        else: # 收牌区
+            card = cards[0]
+            home = self.homes[dst[1]]
+            if len(cards) != 1 or not isNormal(card) or home is None or home[0] != card[0] or home[1] != int(card[1]) - 1:
+                return False
+            self.homes[dst[1]] = (card[0], int(card[1]))
+        if src[0] == "tray": del self.trays[src[1]][row:]
+        else: self.slots[src[1]] = None
+        return True
+
+    def collapse(self, dragon): # 拆掉四张露出的龙牌，放进最左边的空槽位（先清掉槽位里的同种龙牌）
+        exposed = sum(1 for tray in self.trays if len(tray) > 0 and tray[-1] == dragon) + self.slots.count(dragon)
+        if exposed != 4 or (None not in self.slots and dragon not in self.slots): return False
+        for tray in self.trays:
+            if len(tray) > 0 and tray[-1] == dragon: tray.pop()
+        self.slots = [None if slot == dragon else slot for slot in self.slots]
+        self.slots[self.slots.index(None)] = LOCKED
+        return True
+
+    def autoCollect(self): # 按游戏规则自动收牌，每一轮算一段动画
+        rounds = 0
+        while True:
+            collected = False
+            for tray in self.trays: # 花牌和 1
+                if len(tray) > 0 and (tray[-1] == "F" or isNormal(tray[-1]) and tray[-1][1] == "1"):
+                    card = tray.pop()
+                    if card != "F": self.homes[self.homes.index(None)] = (card[0], 1)
+                    collected = True
+            remaining = [card for tray in self.trays for card in tray] + [slot for slot in self.slots if slot not in (None, LOCKED)]
+            lowest = {suit: min([int(card[1]) for card in remaining if card[0] == suit], default=10) for suit in SUITS}
+            lowestOfAll = min(lowest.values())
+            for suit, value in lowest.items(): # 每个花色至多收一张
+                if not (value == 2 or 2 < value <= lowestOfAll and value < 10): continue
+                card = suit + str(value)
+                home = [i for i,h in enumerate(self.homes) if h is not None and h[0] == suit][0]
+                for tray in self.trays:
+                    if len(tray) > 0 and tray[-1] == card:
+                        tray.pop(); self.homes[home] = (suit, value); collected = True
+                if card in self.slots:
+                    self.slots[self.slots.index(card)] = None; self.homes[home] = (suit, value); collected = True
+            if not collected: break
+            rounds += 1
+        if rounds > 0:
+            self.stats["collectRounds"] += rounds
+            self.busyUntil = max(self.busyUntil, self.now()) + COLLECT_TIME*rounds
+        if self.isWon() and self.dealEnd > 0:
+            self.stats["won"] += 1
+            self.dealEnd = 0.0 # 每局只计一次
+
+    def isWon(self):
+        return all(len(tray) == 0 for tray in self.trays) and all(slot in (None, LOCKED) for slot in self.slots)
+
+    def report(self): # 模拟统计
+        return dict(self.stats)
+
+def main(argv = None): # 用完整的流程在模拟器中玩若干局
+    from pipeline import runPipeline
+    from recognition import CardRecognizer, detectColorHome
+    from search import solve, STRATEGIES
+    from optimizer import optimizeSolution
+    parser = argparse.ArgumentParser(description="在模拟器中用完整流程（识别、求解、执行）测试每小时局数")
+    parser.add_argument("--deals", type=int, default=20, help="局数")
+    parser.add_argument("--seed", type=int, default=0, help="第一局的种子")
+    parser.add_argument("--strategy", default="greedy", choices=sorted(STRATEGIES), help="搜索策略")
+    parser.add_argument("--max-iterations", type=int, default=10000, help="每局的迭代次数上限")
+    parser.add_argument("--optimize", type=int, default=0, metavar="DEPTH", help="执行前用深度为 DEPTH 的局部搜索缩短方案")
+    args = parser.parse_args(argv)
+
+    backend = SimulatorBackend(args.seed)
+    recognizer = CardRecognizer()
+    def solveBoard(cardList, colorHome):
+        state = solve(cardList, colorHome, maxIterations=args.max_iterations, verbose=False, strategy=args.strategy)
+        return optimizeSolution(state, args.optimize) if args.optimize > 0 else state
+    wallStart = time.perf_counter()
+    stats = runPipeline(backend, recognizer, detectColorHome, solveBoard, lambda preState, state: executeMove(backend, preState, state, verbose=False),
+                        maxDeals=args.deals, verbose=False)
+    report = backend.report()
+    timings = stats["timings"]
+    print(f"{stats['deals']} 局，解出 {stats['solved']} 局，模拟中赢了 {report['won']} 局，非法操作 {report['illegal']} 次")
+    print(f"模拟时间 {stats['elapsed']:.1f} 秒（识别 {timings['recognize']:.1f}，求解 {timings['solve']:.1f}，执行 {timings['execute']:.1f}），"
+          f"每小时 {stats['dealsPerHour']:.1f} 局；实际用时 {time.perf_counter()-wallStart:.1f} 秒")
+    if report["won"] != stats["solved"] or report["illegal"] > 0:
+        print("警告：解出的方案没有在模拟器中全部赢下")
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
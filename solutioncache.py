@@ -0,0 +1,171 @@
+""" 持久化方案缓存
+以牌局的规范指纹为键，把找到的方案保存在磁盘上，再次遇到相同或等价的牌局（牌堆顺序不同）时直接取出。
+
+指纹：把 8 个牌堆编码后排序（与牌堆顺序无关），连同收牌区信息取 16 字节 blake2b 摘要。
+方案中的牌堆序号按排序后的顺序保存，取出时再映射回当前牌局的序号。
+
+文件格式为只追加的记录序列，每条记录以一个类型字节开头：
+    S  键(16 字节) 动作数(uint16) 动作(uint16 * 动作数)    保存方案
+    T  键(16 字节)                                        命中，用于在重启后恢复 LRU 顺序
+打开时通过 mmap 顺序扫描一遍建立内存索引（不把整个文件读入内存），查找时也通过 mmap 直接读取方案。
+索引是普通的 dict，值为打包成一个整数的 (偏移, 动作数)，插入顺序即 LRU 顺序，每条只占一个字典项。
+条目数超过上限时按 LRU 淘汰；命中记录和被替换、淘汰的方案都是失效记录，超过有效记录时（保存或命中后检查）整体重写一次，
+所以只查不存的使用方式下文件大小也有上限。
+"""
+import hashlib
+import mmap
+import os
+import struct
+
+from solver import encodeCard, remapMoves
+
+KEY_SIZE = 16
+RECORD_SOLUTION = b"S"
+RECORD_TOUCH = b"T"
+MOVE_COUNT_FORMAT = struct.Struct("<H")
+COUNT_BITS = 16 # 索引值的低 16 位为动作数，其余为动作在文件中的偏移
+COUNT_MASK = (1 << COUNT_BITS) - 1
+COMPACT_MIN_BYTES = 1 << 20 # 失效记录少于该字节数时不重写文件
+
+def canonicalDeal(cardList, colorHome): # 返回 (规范化的编码字节, order)；order[k] 为排序后第 k 堆在原牌局中的序号
+    trays = [bytes(encodeCard(card) for card in tray) for tray in cardList]
+    order = sorted(range(len(trays)), key=lambda i: trays[i])
+    data = b"|".join(trays[i] for i in order)
+    homes = bytes(255 if colorHome.get(suit) is None else colorHome[suit] for suit in "rbg")
+    return data + b"#" + homes, order
+
+def fingerprint(cardList, colorHome): # 牌局的规范指纹，与牌堆顺序无关
+    data, _ = canonicalDeal(cardList, colorHome)
+    return hashlib.blake2b(data, digest_size=KEY_SIZE).digest()
+
+class SolutionCache: # 磁盘方案缓存，按 LRU 淘汰，最多保存 maxEntries 条
+    def __init__(self, path, maxEntries = 1000000):
+        self.path = path
+        self.maxEntries = maxEntries
+        self.index = {} # 键 -> 动作在文件中的偏移 << COUNT_BITS | 动作数，按最近使用排序
+        self.hits = self.misses = 0
+        self.deadBytes = 0 # 文件中已失效的字节数
+        self.map = None
+        self.file = open(path, "a+b")
+        self.load()
+
+    def load(self): # 通过 mmap 顺序扫描文件建立索引，末尾不完整的记录（写入中断）会被截掉
+        self.remap()
+        data = self.map if self.map is not None else b""
+        index = self.index
+        size = len(data)
+        offset = 0
+        while offset < size:
+            recordType = data[offset:offset+1]
+            key = data[offset+1:offset+1+KEY_SIZE]
+            if len(key) < KEY_SIZE or recordType not in (RECORD_SOLUTION, RECORD_TOUCH): break
+            if recordType == RECORD_TOUCH:
+                if key in index: index[key] = index.pop(key)
+                self.deadBytes += 1 + KEY_SIZE
+                offset += 1 + KEY_SIZE
+                continue
+            header = offset + 1 + KEY_SIZE
+            if header + MOVE_COUNT_FORMAT.size > size: break
+            (count,) = MOVE_COUNT_FORMAT.unpack_from(data, header)
+            end = header + MOVE_COUNT_FORMAT.size + 2*count
+            if end > size: break
+            old = index.pop(key, None)
+            if old is not None: self.deadBytes += self.recordSize(old & COUNT_MASK)
+            index[key] = (header + MOVE_COUNT_FORMAT.size) << COUNT_BITS | count
+            offset = end
+        if offset < size:
+            self.map.close(); self.map = None # 映射中的文件不能截短
+            self.file.truncate(offset)
+        self.file.seek(0, os.SEEK_END)
+        while len(index) > self.maxEntries:
+            self.evictOldest()
+        self.remap()
+
+    @staticmethod
+    def recordSize(count):
+        return 1 + KEY_SIZE + MOVE_COUNT_FORMAT.size + 2*count
+
+    def remap(self): # 文件增长后重新映射
+        if self.map is not None: self.map.close()
+        self.file.flush()
+        size = os.fstat(self.file.fileno()).st_size
+        self.map = mmap.mmap(self.file.fileno(), size, access=mmap.ACCESS_READ) if size > 0 else None
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, key):
+        return key in self.index
+
+    def readMoves(self, key): # 读取键对应的方案（规范序号）
+        value = self.index[key]
+        offset, count = value >> COUNT_BITS, value & COUNT_MASK
+        if self.map is None or offset + 2*count > len(self.map): self.remap()
+        return list(struct.unpack_from(f"<{count}H", self.map, offset))
+
+    def lookup(self, cardList, colorHome): # 返回适用于当前牌局序号的动作列表，未命中返回 None
+        data, order = canonicalDeal(cardList, colorHome)
+        key = hashlib.blake2b(data, digest_size=KEY_SIZE).digest()
+        if key not in self.index:
+            self.misses += 1
+            return None
+        self.hits += 1
+        moves = self.readMoves(key)
+        self.index[key] = self.index.pop(key)
+        self.file.write(RECORD_TOUCH + key)
+        self.deadBytes += 1 + KEY_SIZE
+        self.compactIfNeeded()
+        return remapMoves(moves, order) # order[规范序号] = 当前序号
+
+    def store(self, cardList, colorHome, moves): # 保存当前牌局的方案
+        data, order = canonicalDeal(cardList, colorHome)
+        key = hashlib.blake2b(data, digest_size=KEY_SIZE).digest()
+        toCanonical = [0]*len(order)
+        for k, i in enumerate(order): toCanonical[i] = k
+        canonicalMoves = remapMoves(moves, toCanonical)
+        old = self.index.pop(key, None)
+        if old is not None: self.deadBytes += self.recordSize(old & COUNT_MASK)
+        self.file.seek(0, os.SEEK_END)
+        offset = self.file.tell()
+        self.file.write(RECORD_SOLUTION + key + MOVE_COUNT_FORMAT.pack(len(canonicalMoves)))
+        self.file.write(struct.pack(f"<{len(canonicalMoves)}H", *canonicalMoves))
+        self.index[key] = (offset + 1 + KEY_SIZE + MOVE_COUNT_FORMAT.size) << COUNT_BITS | len(canonicalMoves)
+        while len(self.index) > self.maxEntries:
+            self.evictOldest()
+        self.compactIfNeeded()
+
+    def evictOldest(self): # 淘汰最久未使用的一条
+        key = next(iter(self.index))
+        self.deadBytes += self.recordSize(self.index.pop(key) & COUNT_MASK)
+
+    def compactIfNeeded(self): # 失效记录多于有效记录（且超过 COMPACT_MIN_BYTES）时重写文件
+        if self.deadBytes > max(self.file.tell() - self.deadBytes, COMPACT_MIN_BYTES):
+            self.compact()
+
+    def compact(self): # 按 LRU 顺序（最久未使用在前）重写文件，去掉失效记录
+        entries = [(key, self.readMoves(key)) for key in self.index]
+        tmpPath = self.path + ".tmp"
+        with open(tmpPath, "wb") as f:
+            for key, moves in entries:
+                f.write(RECORD_SOLUTION + key + MOVE_COUNT_FORMAT.pack(len(moves)))
+                f.write(struct.pack(f"<{len(moves)}H", *moves))
+        if self.map is not None: self.map.close(); self.map = None
+        self.file.close()
+        os.replace(tmpPath, self.path)
+        self.file = open(self.path, "a+b")
+        self.index.clear()
+        self.deadBytes = 0
+        self.load()
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        if self.map is not None: self.map.close(); self.map = None
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,608 @@
+""" 深圳IO 卡牌游戏求解器 - 局面表示
+与界面无关的局面、动作与局面键，不依赖 opencv / pyautogui，可单独导入使用。搜索部分见 search.py。
+
+卡牌使用小整数编码：
+    普通牌  花色*9 + 点数-1  (r: 0~8, b: 9~17, g: 18~26)
+    龙牌    27 (R 红中), 28 (B 白板), 29 (G 发财)
+    花牌    30
+每个牌堆是一个不可变的 bytes，子状态与父状态共享未改动的牌堆。
+动作打包为一个整数，见 packMove；moveToDict 可还原为 {"from": ..., "to": ...} 形式。
+
+局面键 (State.key) 与牌堆顺序、槽位顺序无关：每个牌堆按 (牌, 深度) 取 Zobrist 值异或，
+经过混合后与各槽位的 Zobrist 值相加 (mod 2^64)。键随动作增量更新，不需要重新扫描整个局面。
+"""
+import random
+from array import array
+
+TRAY_COUNT = 8 # 牌堆数
+SLOT_COUNT = 3 # 左上角槽位数
+NUM_TO_CHINESE = ['零','一','二','三','四','五','六','七','八','九'] # 数字转中文
+
+# 卡牌编码
+SUITS = "rbg"      # 花色：筒子、万子、条子
+DRAGONS = "RBG"    # 与花色一一对应的龙牌
+DRAGON_BASE = 27   # 第一张龙牌的编码，小于它的都是普通牌
+FLOWER = 30        # 花牌
+EMPTY = 31         # 空槽位
+LOCKED = 32        # 被收起的龙牌占用的槽位 (X)
+CARD_NAMES = [s+str(v) for s in SUITS for v in range(1,10)] + list(DRAGONS) + ["F", None, "X"]
+CARD_CODES = {name: code for code, name in enumerate(CARD_NAMES) if name is not None}
+SUIT_OF = [code//9 for code in range(DRAGON_BASE)] + [code-DRAGON_BASE for code in range(DRAGON_BASE,FLOWER)] + [-1]*3
+VALUE_OF = [code%9+1 for code in range(DRAGON_BASE)] + [0]*6
+CODE_COUNT = LOCKED+1
+# 自动收牌用的位掩码：每张普通牌与花牌各占一位，龙牌有四张相同的，不参与
+CARD_BIT = [1 << code if code < DRAGON_BASE or code == FLOWER else 0 for code in range(CODE_COUNT)]
+ONES_AND_FLOWER_MASK = CARD_BIT[FLOWER] | CARD_BIT[0] | CARD_BIT[9] | CARD_BIT[18] # 露出即收走的牌
+SUIT_MASK = 0x1FF
+# STACKABLE[card1*CODE_COUNT+card2] 为 1 表示 card1 可以叠在 card2 上；STACK_ON[card] 为 card 可以叠上去的所有牌
+STACKABLE = bytes(1 if c1 < DRAGON_BASE and c2 < DRAGON_BASE and c1//9 != c2//9 and c1%9+1 == c2%9 else 0
+                  for c1 in range(CODE_COUNT) for c2 in range(CODE_COUNT))
+STACK_ON = [tuple(c2 for c2 in range(CODE_COUNT) if STACKABLE[c1*CODE_COUNT+c2]) for c1 in range(CODE_COUNT)]
+STACK_MASK = [sum(CARD_BIT[c2] for c2 in STACK_ON[c1]) for c1 in range(CODE_COUNT)] # STACK_ON 的位掩码形式
+
+# 动作编码：低 3 位为类型，其后依次为来源(4 位)、目标(4 位)、张数
+MOVE_TRAY = 0         # 牌堆 -> 牌堆
+MOVE_SLOT_TO_TRAY = 1 # 槽位 -> 牌堆
+MOVE_TRAY_TO_SLOT = 2 # 牌堆 -> 槽位
+MOVE_POP = 3          # 牌堆顶部的牌收走，来源为牌堆
+MOVE_COLLAPSE = 4     # 收起四张龙牌，来源为龙牌对应的花色
+
+def packMove(kind, src = 0, dst = 0, count = 1): # 只有牌堆之间、牌堆到槽位的动作带张数，其余动作的张数须为 0（与 getValid*Actions 一致）
+    return kind | src << 3 | dst << 7 | count << 11
+
+def moveKind(move): return move & 7
+def moveSrc(move): return (move >> 3) & 15
+def moveDst(move): return (move >> 7) & 15
+def moveCount(move): return move >> 11
+
+def moveToDict(move): # 打包的动作 -> 字典形式，用于输出和执行
+    kind, src, dst = move & 7, (move >> 3) & 15, (move >> 7) & 15
+    if kind == MOVE_COLLAPSE: return {"collapse": DRAGONS[src]}
+    if kind == MOVE_POP: return {"pop": src}
+    if kind == MOVE_TRAY: return {"from": {"tray": src, "count": move >> 11}, "to": {"tray": dst}}
+    if kind == MOVE_SLOT_TO_TRAY: return {"from": {"slot": src}, "to": {"tray": dst}}
+    return {"from": {"tray": src, "count": 1}, "to": {"slot": dst}}
+
+def moveFromDict(action): # 字典形式 -> 打包的动作
+    if "collapse" in action: return packMove(MOVE_COLLAPSE, DRAGONS.index(action["collapse"]), 0, 0)
+    if "pop" in action: return packMove(MOVE_POP, action["pop"], 0, 0)
+    if "slot" in action["from"]: return packMove(MOVE_SLOT_TO_TRAY, action["from"]["slot"], action["to"]["tray"], 0)
+    if "slot" in action["to"]: return packMove(MOVE_TRAY_TO_SLOT, action["from"]["tray"], action["to"]["slot"])
+    return packMove(MOVE_TRAY, action["from"]["tray"], action["to"]["tray"], action["from"]["count"])
+
+def remapMoves(moves, trayMap, slotMap = None): # 按 trayMap[旧序号] = 新序号（及 slotMap）改写动作中的牌堆（槽位）序号
+    result = []
+    for move in moves:
+        kind, src, dst, count = move & 7, (move >> 3) & 15, (move >> 7) & 15, move >> 11
+        if kind == MOVE_TRAY: src, dst = trayMap[src], trayMap[dst]
+        elif kind == MOVE_SLOT_TO_TRAY: src, dst = (slotMap[src] if slotMap else src), trayMap[dst]
+        elif kind == MOVE_TRAY_TO_SLOT: src, dst = trayMap[src], (slotMap[dst] if slotMap else dst)
+        elif kind == MOVE_POP: src = trayMap[src]
+        result.append(packMove(kind, src, dst, count))
+    return result
+
+# Zobrist 表，固定种子保证不同进程得到相同的局面键
+MAX_TRAY_DEPTH = 40
+KEY_MASK = (1<<64)-1
+_zobristRandom = random.Random(0x5A17E)
+ZOBRIST_TRAY = [_zobristRandom.getrandbits(64) for _ in range(FLOWER+1) for _ in range(MAX_TRAY_DEPTH)] # 下标：牌*MAX_TRAY_DEPTH+深度
+ZOBRIST_SLOT = [_zobristRandom.getrandbits(64) for _ in range(LOCKED+1)] # 下标：槽位内容
+ZOBRIST_SLOT[EMPTY] = 0
+
+def mixTrayKey(key): # 把牌堆的 Zobrist 值打散后再相加，避免不同牌堆之间的牌互相抵消
+    key = (key ^ (key >> 30)) * 0xBF58476D1CE4E5B9 & KEY_MASK
+    key = (key ^ (key >> 27)) * 0x94D049BB133111EB & KEY_MASK
+    return key ^ (key >> 31)
+
+def trayZobrist(tray): # 从头计算一个牌堆的 Zobrist 值
+    key = 0
+    for depth,card in enumerate(tray):
+        key ^= ZOBRIST_TRAY[card*MAX_TRAY_DEPTH+depth]
+    return key
+
+def encodeCard(name): # 卡牌名称 -> 编码，None 表示空槽位
+    return EMPTY if name is None else CARD_CODES[name]
+
+def decodeCard(code): # 编码 -> 卡牌名称
+    return CARD_NAMES[code]
+
+def decodeTray(tray): # 编码牌堆 -> 卡牌名称列表
+    return [CARD_NAMES[card] for card in tray]
+
+# 定义状态
+def replayMoves(initialState, moves, check = False): # 从 initialState 依次执行 moves，返回最终局面（prevState 链完整）
+    # check 为 True 时逐步检查动作是否合法，遇到非法动作返回 None
+    state = initialState
+    for move in moves:
+        if check and not state.isLegalMove(move): return None
+        state = State(state, move)
+    return state
+
+def canBeStacked(card1, card2): # 普通牌、花色不同、数字相邻才能堆叠
+    return STACKABLE[card1*CODE_COUNT+card2] == 1
+class State:
+    __slots__ = ("trays", "slots", "cardHome", "cardHomeId", "turn", "prevState", "action",
+                 "autoRemoveTimes", "lowestPersuit", "remainingCards", "priority", "trayKeys", "key",
+                 "boardMask", "topMask", "slotMask", "node")
+
+    def __init__(self, prevState = None, action = None, customTrays = None, initColorHome = None):
+        if prevState is None:
+            if customTrays is None: customTrays = [[] for _ in range(TRAY_COUNT)]
+            if initColorHome is None: initColorHome = {'r':None, 'b':None, 'g':None}
+            self.trays = [bytes(encodeCard(card) for card in tray) for tray in customTrays]
+            self.slots = [EMPTY]*SLOT_COUNT
+            self.trayKeys = [trayZobrist(tray) for tray in self.trays]
+            self.key = sum([mixTrayKey(k) for k in self.trayKeys]) & KEY_MASK
+            self.boardMask = 0 # 仍在桌面上的普通牌
+            for tray in self.trays:
+                for card in tray:
+                    if card < DRAGON_BASE: self.boardMask |= CARD_BIT[card]
+            self.topMask = 0 # 露在牌堆顶部的普通牌与花牌
+            for tray in self.trays:
+                if len(tray) > 0: self.topMask |= CARD_BIT[tray[-1]]
+            self.slotMask = 0 # 槽位中的普通牌
+            self.cardHome = tuple(initColorHome[s] for s in SUITS) # 按花色索引的收牌区位置
+            self.cardHomeId = sum([1 if c is not None else 0 for c in initColorHome.values()])
+            self.turn = 0
+        else: # 只复制外层列表，未改动的牌堆与父状态共享
+            self.trays = list(prevState.trays)
+            self.slots = list(prevState.slots)
+            self.trayKeys = list(prevState.trayKeys)
+            self.key = prevState.key
+            self.boardMask = prevState.boardMask
+            self.topMask = prevState.topMask
+            self.slotMask = prevState.slotMask
+            self.cardHome = prevState.cardHome
+            self.cardHomeId = prevState.cardHomeId
+            self.turn = prevState.turn + 1
+
+        self.prevState = prevState
+        self.node = -1 # 在 SearchArena 中的结点序号，搜索时使用
+        # do action
+        trays, slots = self.trays, self.slots
+        if action is not None:
+            kind, src, dst = action & 7, (action >> 3) & 15, (action >> 7) & 15
+            if kind == MOVE_TRAY:
+                self.putCards(dst, self.takeCards(src, action >> 11))
+            elif kind == MOVE_SLOT_TO_TRAY:
+                self.putCards(dst, bytes((slots[src],)))
+                self.setSlot(src, EMPTY)
+            elif kind == MOVE_TRAY_TO_SLOT:
+                self.setSlot(dst, self.takeCards(src, 1)[0])
+            elif kind == MOVE_POP:
+                self.boardMask &= ~CARD_BIT[self.takeCards(src, 1)[0]]
+            else: # collapse
+                target = DRAGON_BASE + src
+                for i,tray in enumerate(trays):
+                    if len(tray) != 0 and tray[-1] == target:
+                        self.takeCards(i, 1)
+                for i,slot in enumerate(slots):
+                    if slot == target: self.setSlot(i, EMPTY)
+                for i in range(len(slots)):
+                    if slots[i] == EMPTY:
+                        self.setSlot(i, LOCKED)
+                        break
+        # auto remove cards
+        self.autoRemoveTimes = 0
+        self.autoRemoveCards()
+        self.trays = tuple(trays)
+        self.slots = bytes(slots)
+        self.trayKeys = tuple(self.trayKeys)
+        self.action = action
+        self.remainingCards = sum([len(t) for t in trays]) + sum([1 if s < EMPTY else 0 for s in slots])
+        self.priority = self.calcPriority()
+
+    def __lt__(self, other): # 用于优先队列
+        return self.priority < other.priority
+
+    def takeCards(self, i, count): # 从第 i 堆顶部取走 count 张牌并增量更新局面键，仅在构造过程中使用
+        tray = self.trays[i]
+        n = len(tray)
+        trayKey = oldKey = self.trayKeys[i]
+        for depth in range(n-count, n):
+            trayKey ^= ZOBRIST_TRAY[tray[depth]*MAX_TRAY_DEPTH+depth]
+        self.topMask = (self.topMask & ~CARD_BIT[tray[-1]]) | (CARD_BIT[tray[n-count-1]] if n > count else 0)
+        self.trays[i] = tray[:n-count]
+        self.trayKeys[i] = trayKey
+        self.key = (self.key + mixTrayKey(trayKey) - mixTrayKey(oldKey)) & KEY_MASK
+        return tray[n-count:]
+
+    def putCards(self, i, cards): # 把 cards 放到第 i 堆顶部并增量更新局面键
+        tray = self.trays[i]
+        n = len(tray)
+        trayKey = oldKey = self.trayKeys[i]
+        for depth,card in enumerate(cards, n):
+            trayKey ^= ZOBRIST_TRAY[card*MAX_TRAY_DEPTH+depth]
+        self.topMask = (self.topMask & ~(CARD_BIT[tray[-1]] if n > 0 else 0)) | CARD_BIT[cards[-1]]
+        self.trays[i] = tray + cards
+        self.trayKeys[i] = trayKey
+        self.key = (self.key + mixTrayKey(trayKey) - mixTrayKey(oldKey)) & KEY_MASK
+
+    def setSlot(self, i, card): # 修改第 i 个槽位并增量更新局面键
+        self.key = (self.key + ZOBRIST_SLOT[card] - ZOBRIST_SLOT[self.slots[i]]) & KEY_MASK
+        self.slotMask = (self.slotMask & ~CARD_BIT[self.slots[i]]) | CARD_BIT[card]
+        self.slots[i] = card
+
+    def autoRemoveCards(self): # 自动移除卡牌，构造过程中 trays/slots 仍是可修改的列表
+        # 每一轮与游戏的收牌动画一一对应：先收走露出的花牌和 1，再收走不低于各花色最小值的牌。
+        # 各花色的最小值由 boardMask 直接得到，露出的牌由 topMask/slotMask 维护，没有可收的牌时不扫描牌堆。
+        trays, slots = self.trays, self.slots
+        counts = 0
+        while True:
+            counts += 1
+            if counts > 1000:
+                print("卡牌自动移除失败")
+                print([decodeTray(tray) for tray in trays])
+                print(decodeTray(slots))
+                outputHowToArriveAtState(self)
+                raise Exception("卡牌自动移除失败")
+            callAgainFlag = False
+            if self.topMask & ONES_AND_FLOWER_MASK:
+                for i,tray in enumerate(trays):
+                    if len(tray) == 0: continue
+                    lastCard = tray[-1]
+                    if lastCard == FLOWER:
+                        self.takeCards(i, 1)
+                    elif lastCard < DRAGON_BASE and lastCard%9 == 0:
+                        cardHome = list(self.cardHome)
+                        cardHome[lastCard//9] = self.cardHomeId
+                        self.cardHome = tuple(cardHome)
+                        self.cardHomeId += 1
+                        self.boardMask &= ~CARD_BIT[lastCard]
+                        self.takeCards(i, 1)
+                callAgainFlag = True
+            lowestPersuit = self.calcLowestPersuit()
+            lowestOfAll = min(lowestPersuit)
+            removable = 0 # 本轮可以收走的牌：每个花色至多一张
+            for suit,value in enumerate(lowestPersuit):
+                if value == 2 or (2 < value <= lowestOfAll and value < 10):
+                    removable |= CARD_BIT[suit*9+value-1]
+            if removable & (self.topMask | self.slotMask):
+                if removable & self.topMask:
+                    for i,tray in enumerate(trays):
+                        if len(tray) > 0 and CARD_BIT[tray[-1]] & removable:
+                            self.boardMask &= ~CARD_BIT[tray[-1]]
+                            self.takeCards(i, 1)
+                if removable & self.slotMask:
+                    for i,slotCard in enumerate(slots):
+                        if CARD_BIT[slotCard] & removable:
+                            self.boardMask &= ~CARD_BIT[slotCard]
+                            self.setSlot(i, EMPTY)
+                callAgainFlag = True
+            if not callAgainFlag: break
+        self.lowestPersuit = lowestPersuit
+        self.autoRemoveTimes = counts-1
+
+    def calcLowestPersuit(self): # 各花色仍在桌面上的最小点数，已收完为 10
+        boardMask = self.boardMask
+        result = []
+        for suit in range(3):
+            suitMask = (boardMask >> (suit*9)) & SUIT_MASK
+            result.append((suitMask & -suitMask).bit_length() if suitMask else 10)
+        return tuple(result)
+
+    def undoMove(self, firstEmptyTray, firstEmptySlot): # 直接撤销上一步的动作，没有自动收牌时它只会回到父状态
+        action = self.action
+        if action is None or self.autoRemoveTimes != 0: return None
+        kind, src, dst = action & 7, (action >> 3) & 15, (action >> 7) & 15
+        if kind == MOVE_TRAY or kind == MOVE_TRAY_TO_SLOT:
+            if len(self.trays[src]) == 0: src = firstEmptyTray # 空牌堆之间等价，只会生成到第一个空牌堆的动作
+            if kind == MOVE_TRAY: return packMove(MOVE_TRAY, dst, src, action >> 11)
+            return packMove(MOVE_SLOT_TO_TRAY, dst, src, 0)
+        if kind == MOVE_SLOT_TO_TRAY:
+            return packMove(MOVE_TRAY_TO_SLOT, dst, firstEmptySlot)
+        return None
+
+    def getValidTrayActions(self): # 牌堆之间、槽位到牌堆的移动以及收牌；移到多个空牌堆的等价动作只保留第一个
+        trays, slots = self.trays, self.slots
+        lowestPersuit = self.lowestPersuit
+        result = []
+        exposedDragons = [0, 0, 0]
+        tops = {} # 牌堆顶部的牌 -> 牌堆序号
+        firstEmptyTray = -1
+        for (j,tray) in enumerate(trays):
+            if len(tray) > 0: tops[tray[-1]] = j
+            elif firstEmptyTray < 0: firstEmptyTray = j
+        for (i,tray) in enumerate(trays):
+            n = len(tray)
+            if n == 0: continue
+            lastCard = tray[-1]
+            if lastCard >= DRAGON_BASE: # 特殊牌
+                exposedDragons[lastCard-DRAGON_BASE] += 1
+            elif lowestPersuit[lastCard//9] == lastCard%9+1:
+                result.append(MOVE_POP | i << 3)
+            for cid in range(n):
+                card = tray[n-cid-1]
+                for target in STACK_ON[card]:
+                    j = tops.get(target)
+                    if j is not None and j != i:
+                        result.append(MOVE_TRAY | i << 3 | j << 7 | (cid+1) << 11)
+                if cid == n-1: break
+                if firstEmptyTray >= 0: # 非移动整堆牌
+                    result.append(MOVE_TRAY | i << 3 | firstEmptyTray << 7 | (cid+1) << 11)
+                if not STACKABLE[card*CODE_COUNT+tray[n-cid-2]]:
+                    break
+        slotAvailableForDragonFlag = False
+        slotAvailableForSpecificDragonFlag = [False, False, False]
+        firstEmptySlot = -1
+        for i,slotCard in enumerate(slots):
+            if slotCard == EMPTY:
+                slotAvailableForDragonFlag = True
+                if firstEmptySlot < 0: firstEmptySlot = i
+                continue
+            if slotCard == LOCKED: continue
+            for target in STACK_ON[slotCard]:
+                j = tops.get(target)
+                if j is not None:
+                    result.append(MOVE_SLOT_TO_TRAY | i << 3 | j << 7)
+            if firstEmptyTray >= 0:
+                result.append(MOVE_SLOT_TO_TRAY | i << 3 | firstEmptyTray << 7)
+            if slotCard >= DRAGON_BASE:
+                slotAvailableForSpecificDragonFlag[slotCard-DRAGON_BASE] = True
+                exposedDragons[slotCard-DRAGON_BASE] += 1
+        for dragon in range(3):
+            if exposedDragons[dragon] == 4 and (slotAvailableForDragonFlag or slotAvailableForSpecificDragonFlag[dragon]):
+                result.append(MOVE_COLLAPSE | dragon << 3)
+        undo = self.undoMove(firstEmptyTray, firstEmptySlot)
+        if undo is not None and undo in result: result.remove(undo)
+        return result
+    def getValidSlotActions(self): # 牌堆顶部的牌移到槽位，多个空槽位等价，只移到第一个
+        firstEmptySlot = self.slots.find(EMPTY)
+        if firstEmptySlot < 0: return []
+        result = []
+        for (i,tray) in enumerate(self.trays):
+            if len(tray) == 0: continue
+            result.append(MOVE_TRAY_TO_SLOT | i << 3 | firstEmptySlot << 7 | 1 << 11)
+        undo = self.undoMove(self.trays.index(b"") if b"" in self.trays else -1, firstEmptySlot)
+        if undo is not None and undo in result: result.remove(undo)
+        return result
+
+    def isLegalMove(self, move): # 按游戏规则判断动作是否合法，不做等价动作的裁剪
+        trays, slots = self.trays, self.slots
+        kind, src, dst, count = move & 7, (move >> 3) & 15, (move >> 7) & 15, move >> 11
+        if kind == MOVE_TRAY or kind == MOVE_TRAY_TO_SLOT:
+            if src >= len(trays) or count < 1 or len(trays[src]) < count: return False
+            tray = trays[src]
+            for i in range(len(tray)-count, len(tray)-1):
+                if not STACKABLE[tray[i+1]*CODE_COUNT+tray[i]]: return False
+            if kind == MOVE_TRAY_TO_SLOT:
+                return count == 1 and dst < len(slots) and slots[dst] == EMPTY
+            if dst >= len(trays) or dst == src: return False
+            return len(trays[dst]) == 0 or STACKABLE[tray[-count]*CODE_COUNT+trays[dst][-1]] == 1
+        if kind == MOVE_SLOT_TO_TRAY:
+            if src >= len(slots) or dst >= len(trays) or slots[src] >= EMPTY: return False
+            return len(trays[dst]) == 0 or STACKABLE[slots[src]*CODE_COUNT+trays[dst][-1]] == 1
+        if kind == MOVE_POP:
+            if src >= len(trays) or len(trays[src]) == 0: return False
+            card = trays[src][-1]
+            return card < DRAGON_BASE and self.lowestPersuit[card//9] == card%9+1
+        if kind == MOVE_COLLAPSE:
+            if src >= 3: return False
+            dragon = DRAGON_BASE + src
+            exposed = sum(1 for tray in trays if len(tray) > 0 and tray[-1] == dragon) + slots.count(dragon)
+            return exposed == 4 and (EMPTY in slots or dragon in slots)
+        return False
+
+    def isStuck(self): # 槽位已满、没有空牌堆，除了撤销上一步之外没有任何动作：这个局面的子树中不会有新局面
+        trays, slots = self.trays, self.slots
+        if self.remainingCards == 0 or EMPTY in slots or b"" in trays: return False
+        topMask, lowestPersuit = self.topMask, self.lowestPersuit
+        moves = 0 # 找到的动作数，超过 1 个时至少有一个不是撤销
+        exposedDragons = [0, 0, 0]
+        for tray in trays:
+            card = tray[-1]
+            if card >= DRAGON_BASE:
+                if card < FLOWER: exposedDragons[card-DRAGON_BASE] += 1
+                continue
+            if lowestPersuit[card//9] == card%9+1: return False # 可以收走
+            for depth in range(len(tray)-1, -1, -1): # 顶部叠好的一串牌中每一张都可以连同上面的牌一起移走
+                card = tray[depth]
+                targets = STACK_MASK[card] & topMask
+                if targets: moves += 1 if targets & (targets-1) == 0 else 2
+                if depth == 0 or not STACKABLE[card*CODE_COUNT+tray[depth-1]]: break
+            if moves > 1: return False
+        for slotCard in slots:
+            if slotCard >= DRAGON_BASE:
+                if slotCard < FLOWER: exposedDragons[slotCard-DRAGON_BASE] += 1
+                continue
+            targets = STACK_MASK[slotCard] & topMask
+            if targets: moves += 1 if targets & (targets-1) == 0 else 2
+        for dragon in range(3):
+            if exposedDragons[dragon] == 4 and DRAGON_BASE+dragon in slots: return False # 可以收起龙牌
+        if moves == 0: return True
+        return moves == 1 and len(self.getValidTrayActions()) == 0 # 唯一的动作可能就是撤销
+
+    def calcPriority(self, turnWeight = 0.1, stackWeight = 0.9): # 计算优先级，越小越优先；权重可由搜索策略调整
+        if self.remainingCards == 0 : return -999
+        if self.remainingCards < 10: return -100 + self.remainingCards + self.turn*turnWeight
+        return self.remainingCards + self.turn*turnWeight - self.calcStackedCards()*stackWeight
+
+    def calcStackedCards(self): # 已叠好的牌数，整堆叠好时额外加分
+        stackedCards = 0
+        for tray in self.trays:
+            if len(tray) == 0: continue
+            localStackedCards = 0
+            for i in range(len(tray)-1,0,-1):
+                if STACKABLE[tray[i]*CODE_COUNT+tray[i-1]]:
+                    localStackedCards += 1
+            if len(tray)>1 and localStackedCards == len(tray)-1:
+                if VALUE_OF[tray[0]] == 9:
+                    stackedCards += localStackedCards * 1.2
+                else: stackedCards += localStackedCards * 1.1
+            else: stackedCards += localStackedCards
+        return stackedCards
+
+    def countBlocks(self): # 桌面上“块”的数量：叠好的一串牌算一块，槽位中的牌各算一块，用作剩余步数的估计
+        blocks = self.remainingCards
+        for tray in self.trays:
+            for i in range(len(tray)-1,0,-1):
+                if STACKABLE[tray[i]*CODE_COUNT+tray[i-1]]:
+                    blocks -= 1
+        return blocks
+
+    def canonicalForm(self): # 与牌堆、槽位顺序无关的精确局面表示，用于核对键冲突
+        return (tuple(sorted(self.trays)), bytes(sorted(self.slots)))
+
+    def __hash__(self):
+        return self.key
+
+class VisitedStates: # 已访问局面集合，以 State.key 为键；exact 为 True 时在键相同时再比较精确局面
+    def __init__(self, exact = False):
+        self.exact = exact
+        self.table = {} if exact else set()
+        self.collisions = 0 # 键相同但局面不同的次数
+
+    def __len__(self):
+        return len(self.table)
+
+    def add(self, state:State): # 局面未访问过则记录并返回 True
+        key = state.key
+        if not self.exact:
+            if key in self.table: return False
+            self.table.add(key)
+            return True
+        form = state.canonicalForm()
+        known = self.table.get(key)
+        if known is None:
+            self.table[key] = form
+            return True
+        if type(known) is list: # 该键已发生过冲突
+            if form in known: return False
+            known.append(form)
+        else:
+            if known == form: return False
+            self.table[key] = [known, form]
+        self.collisions += 1
+        return True
+
+class TranspositionTable: # 固定大小的置换表，内存占用只取决于 capacity，可代替 VisitedStates
+    # 两路组相联：每个桶两个条目，保存局面键与到达时的步数。桶满时替换步数较大（离初始局面较远）的条目，
+    # 较浅的局面能剪掉更大的子树。被替换的局面之后可能被重复展开，只影响效率，不影响方案的正确性
+    def __init__(self, capacity = 1 << 22):
+        self.buckets = 1 << max(0, (max(capacity, 2) // 2).bit_length() - 1) # 条目数不超过 capacity
+        self.mask = self.buckets - 1
+        self.clear()
+
+    def clear(self):
+        self.keys = array("Q", bytes(16*self.buckets))
+        self.depths = array("H", bytes(4*self.buckets))
+        self.occupied = 0 # 当前保存的条目数
+        self.replacements = 0 # 因桶满而被替换的条目数
+
+    def __len__(self): # 已记录过的局面数（包括之后被替换掉的）
+        return self.occupied + self.replacements
+
+    def nbytes(self): # 表占用的字节数
+        return self.keys.itemsize*len(self.keys) + self.depths.itemsize*len(self.depths)
+
+    def probe(self, key, depth, improve): # 记录 (key, depth)；improve 为 True 时步数更少也视为新局面
+        key = key or 1 # 0 表示空条目
+        keys, depths = self.keys, self.depths
+        i = (key & self.mask) << 1
+        for j in (i, i+1):
+            known = keys[j]
+            if known == key:
+                if not improve or depths[j] <= depth: return False
+                depths[j] = depth
+                return True
+            if known == 0:
+                keys[j] = key; depths[j] = depth
+                self.occupied += 1
+                return True
+        j = i if depths[i] >= depths[i+1] else i+1
+        keys[j] = key; depths[j] = depth
+        self.replacements += 1
+        return True
+
+    def add(self, state:State): # 与 VisitedStates.add 相同：局面未记录过则记录并返回 True
+        return self.probe(state.key, state.turn, False)
+
+    def improve(self, state:State): # 局面未记录过，或这次用更少的步数到达时记录并返回 True
+        return self.probe(state.key, state.turn, True)
+
+    def depthOf(self, key): # 记录中到达该局面的步数，没有记录（或已被替换）时返回 None
+        key = key or 1
+        i = (key & self.mask) << 1
+        if self.keys[i] == key: return self.depths[i]
+        if self.keys[i+1] == key: return self.depths[i+1]
+        return None
+
+class SearchArena: # 搜索树的紧凑存储：每个结点只保存父结点序号、动作和步数，找到方案后再重建路径
+    def __init__(self):
+        self.parents = array("i")
+        self.moves = array("H")
+        self.depths = array("H")
+
+    def __len__(self):
+        return len(self.parents)
+
+    def nbytes(self):
+        return 4*len(self.parents) + 2*len(self.moves) + 2*len(self.depths)
+
+    def add(self, parent, move, depth): # 返回新结点的序号；根结点的 parent 为 -1
+        self.parents.append(parent)
+        self.moves.append(move)
+        self.depths.append(depth)
+        return len(self.parents) - 1
+
+    def path(self, node): # 从根结点到 node 的动作列表
+        moves = []
+        parents, nodeMoves = self.parents, self.moves
+        while parents[node] >= 0:
+            moves.append(nodeMoves[node])
+            node = parents[node]
+        moves.reverse()
+        return moves
+
+def cardToChinese(card): # 卡牌名称 -> 中文
+    if card == "F": return "花牌"
+    elif card == "B": return "白板"
+    elif card == "R": return "红中"
+    elif card == "G": return "发财"
+    elif card[0] == "r": return NUM_TO_CHINESE[int(card[1])]+"筒"
+    elif card[0] == "b": return NUM_TO_CHINESE[int(card[1])]+"万"
+    else: return NUM_TO_CHINESE[int(card[1])]+"条"
+
+def outputCardList(cardList):
+    for i in range(TRAY_COUNT):
+        print("第"+NUM_TO_CHINESE[i+1]+"槽：",end="")
+        for card in cardList[i]:
+            print(cardToChinese(card)+" ", end="")
+        print()
+
+def outputHowToArriveAtState(state:State):
+    if state is not None:
+        methodList = []
+        curState = state
+        while curState.turn != 0:
+            methodList.append(curState)
+            curState = curState.prevState
+        methodList.reverse()
+        for state in methodList:
+            if not hasattr(state, "action"):
+                print("最终状态")
+                continue
+            method = moveToDict(state.action)
+            print("第",state.turn,"回合")
+            if "collapse" in method:
+                print("将",method["collapse"],"拆掉")
+            elif "pop" in method:
+                print("从第",method["pop"]+1,"张牌堆中弹出一张牌")
+            else:
+                if "tray" in method["from"] and "tray" in method["to"]:
+                    print("将第",method["from"]["tray"]+1,"张牌堆的第",method["from"]["count"],"张牌移到",method["to"]["tray"]+1,"牌堆")
+                elif "slot" in method["from"] and "tray" in method["to"]:
+                    print("将第",method["from"]["slot"]+1,"个槽位的牌移到",method["to"]["tray"]+1,"张牌堆")
+                elif "tray" in method["from"] and "slot" in method["to"]:
+                    print("将第",method["from"]["tray"]+1,"张牌堆的第",method["from"]["count"],"张牌移到第",method["to"]["slot"]+1,"个槽位")
+                else:
+                    print("未知操作：",method)
+
+            print("得到：")
+            outputCardList([decodeTray(tray) for tray in state.trays])
+            print("托盘：")
+            for slotCard in state.slots:
+                if slotCard == EMPTY: print("空 ", end="")
+                elif slotCard == LOCKED: print("X ", end="")
+                else: print(cardToChinese(CARD_NAMES[slotCard])+" ", end="")
+            print()
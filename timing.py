@@ -0,0 +1,9 @@
+""" 鼠标操作与动画的时间
+PyAutoGuiBackend 按这些时间操作鼠标，模拟器按它们推进模拟时钟，optimizer 用它们估计方案的执行时间。
+只有常量，不依赖 opencv / pyautogui。
+"""
+WAIT_UNIT = 0.1 # 每次操作时间
+WAIT_SLEEP_UNIT = 0.05 # 每次等待时间
+CLICK_TIME = 2*WAIT_UNIT + WAIT_SLEEP_UNIT   # 一次点击的时间，与 PyAutoGuiBackend.click 相同
+DRAG_TIME = 2*WAIT_UNIT + 2*WAIT_SLEEP_UNIT  # 一次拖动的时间，与 PyAutoGuiBackend.drag 相同
+COLLECT_TIME = 0.76 # 每一轮自动收牌的动画时长